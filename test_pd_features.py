@@ -0,0 +1,63 @@
+import random, unittest
+from tetris_base import TetrisLogicAuto
+from tetris_ai_examples import RandomDumb, PDFast, PierreDellacherie, PDFeatures
+
+
+def game_boards(AI_class,
+                seed,
+                size=(10, 20),
+                garbage=0.0,
+                max_frames=5000,
+                every=5):
+    """
+    运行一局AI游戏，每隔若干帧取出(当前方块副本, 场地副本)
+    garbage: 每帧底部加行的概率
+    RandomDumb使用全局random，一并以seed重置以便复现
+    """
+    random.seed(seed)
+    logic = TetrisLogicAuto(AI_class, None, seed=seed, size=size)
+    rng = random.Random(seed)
+    for frame in range(max_frames):
+        if not logic.running:
+            break
+        if rng.random() < garbage:
+            logic.event_add_line()
+        logic.event_update_frame()
+        if frame % every == 0 and logic.curr_block:
+            yield logic.curr_block.copy(), logic.pool.copy()
+
+
+class TestPDFeatures(unittest.TestCase):
+    """ 增量估值PDFeatures.calc_pd与整盘扫描PierreDellacherie.calc_pd一致 """
+    SIZE = 10, 20
+
+    def check_boards(self, boards):
+        AI = PierreDellacherie(*self.SIZE)
+        count = 0
+        for block, pool in boards:
+            features = PDFeatures(pool, *self.SIZE)
+            for dphase, mblock in features.drops(block):
+                self.assertEqual(
+                    features.calc_pd(mblock), AI.calc_pd(mblock, pool),
+                    (mblock.type, mblock.phase, mblock.x, mblock.y))
+                count += 1
+        self.assertGreater(count, 0)
+
+    def test_random_play(self):
+        """ 随机操作产生大量空洞与悬空方块 """
+        for seed in range(5):
+            self.check_boards(game_boards(RandomDumb, seed, self.SIZE))
+
+    def test_garbage(self):
+        """ 底部加行与消行 """
+        for seed in range(5):
+            self.check_boards(game_boards(PDFast, seed, self.SIZE, 0.01))
+
+    def test_random_garbage(self):
+        """ 随机操作与底部加行 """
+        for seed in range(5):
+            self.check_boards(game_boards(RandomDumb, seed, self.SIZE, 0.005))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,4 @@
-from tetris_base import TetrisAI
+from tetris_base import Block, ColumnHeights, TetrisAI, TetrisAIDrop
 import random, collections
 
 
@@ -21,6 +21,133 @@ class RandomDumb(TetrisAI):
         return res
 
 
+def _popcount(n):
+    return bin(n).count('1')
+
+
+class PDFeatures(ColumnHeights):
+    """
+    Pierre Dellacherie估值的增量特征表
+    以位整数按行、按列存储场地，缓存每行的行变换、井与每列的列变换、空洞
+    评估候选落点时仅重新计算方块覆盖的行与列，结果与calc_pd一致
+    """
+
+    def __init__(self, pool, width, height):
+        self.build([
+            sum(1 << x for x, cell in enumerate(line) if cell)
+            for line in pool
+        ], width, height)
+
+    @classmethod
+    def from_rows(cls, rows, width, height):
+        """ 由逐行位整数构建特征表 """
+        features = cls.__new__(cls)
+        features.build(list(rows), width, height)
+        return features
+
+    def build(self, rows, width, height):
+        """ 计算全场地特征缓存 """
+        self.width, self.height = width, height
+        self.full = (1 << width) - 1  # 满行掩码
+        self.rows = rows
+        self.cols = [
+            sum(1 << y for y, row in enumerate(self.rows) if row >> x & 1)
+            for x in range(width)
+        ]
+        self.heights = [col.bit_length() for col in self.cols]  # 各列高度
+
+        self.row_values = [self.row_value(row) for row in self.rows]
+        self.col_values = [self.col_value(col) for col in self.cols]
+        self.row_total = sum(self.row_values)
+        self.col_total = sum(self.col_values)
+        self.nfull = self.rows.count(self.full)  # 已有满行数
+
+    def row_value(self, row):
+        """ 单行估值: 行变换与井 """
+        transitions = _popcount((row ^ row >> 1) & self.full >> 1)
+        # 井: 空格左右均为方块或墙壁
+        wells = _popcount(~row & self.full & (row << 1 | 1)
+                          & (row >> 1 | 1 << self.width - 1))
+        return -32 * transitions - 34 * wells
+
+    def col_value(self, col):
+        """ 单列估值: 列变换与空洞 """
+        transitions = _popcount((col ^ col >> 1) & (1 << self.height) - 1)
+        holes = col.bit_length() - _popcount(col)
+        return -93 * transitions - 79 * holes
+
+    def collide(self, block, x, y):
+        """ 判断方块置于(x,y)时是否越界或与场地相交 """
+        left, right, masks = Block.MASKS[block.type][block.phase]
+        x += left
+        if x < 0 or x + right - left >= self.width:  # 左右边
+            return True
+        for dy, mask in masks:
+            ny = y + dy
+            if ny < 0:  # 底边
+                return True
+            if ny <= self.height and self.rows[ny] & mask << x:  # 无上界
+                return True
+        return False
+
+    def drops(self, original_block):
+        """
+        遍历方块自当前高度各相位、各列竖直下落的落点
+        Yields:
+            (旋转次数, 落点方块)，落点方块为同一对象，需保留时应复制
+        """
+        block = original_block.copy()
+        for dphase in range(len(Block.SHAPES[block.type])):
+            for tx in range(self.width):
+                if self.collide(block, tx, original_block.y):
+                    continue
+                block.x = tx
+                block.y = self.drop_y(block, tx, original_block.y)
+                yield dphase, block
+            block.rotate()
+
+    def place(self, block):
+        """
+        返回方块落定并消行后的场地
+        Returns:
+            (逐行位整数元组, 消除行数)
+        """
+        rows = list(self.rows)
+        for dx, dy in block:
+            y = block.y + dy
+            if y <= self.height:
+                rows[y] |= 1 << block.x + dx
+        full = self.full
+        if full not in rows:
+            return tuple(rows), 0
+        rows = [row for row in rows if row != full]
+        nline = self.height + 1 - len(rows)
+        return tuple(rows) + (0, ) * nline, nline
+
+    def calc_pd(self, block):
+        """ 评估方块置于当前位置后的pd估值，不修改特征表 """
+        rows, cols = {}, {}
+        for dx, dy in block:
+            x, y = block.x + dx, block.y + dy
+            if y > self.height:  # 无上界
+                continue
+            rows[y] = rows.get(y, 0) | 1 << x
+            cols[x] = cols.get(x, 0) | 1 << y
+
+        row_total, col_total = self.row_total, self.col_total
+        ero1, ero2 = self.nfull, 0
+        for y, mask in rows.items():
+            row = self.rows[y] | mask
+            row_total += self.row_value(row) - self.row_values[y]
+            if row == self.full:  # 消行统计
+                ero1 += 1
+                ero2 += _popcount(mask)
+        for x, mask in cols.items():
+            col_total += self.col_value(self.cols[x] | mask) - self.col_values[x]
+
+        return -45 * block.y + 34 * ero1 * ero2 + row_total + col_total
+
+
 class PierreDellacherie(TetrisAI):
     """ 基于Pierre Dellacherie估值的俄罗斯方块AI """
 
@@ -80,30 +207,16 @@ class PierreDellacherie(TetrisAI):
 
     def get_best_drop(self, original_block, pool):
         """ 遍历可能落点确定最优位置 """
-        block = original_block.copy()  # 复制块用于查找
-        nphase = 1 if block.type == 'O' else 2 if block.type in 'IZS' else 4  # 当前块可用旋转数
         mblock, mvalue = None, (-1e10, 1e10)  # 最优估值 (PD值、操作距离)
+        features = PDFeatures(pool, self.width, self.height)  # 增量估值表
 
-        for dphase in range(nphase):
-            # 寻找可下落位置
-            for tx in range(self.width):
-                if not self.try_move(block, pool, tx, original_block.y):
-                    continue
-
-                # 模拟下落
-                ty = original_block.y
-                while self.try_move(block, pool, tx, ty - 1):
-                    ty -= 1
-
-                # 选择全局最大估值
-                pd_value = self.calc_pd(block, pool)
-                pd_value = (pd_value,
-                            -100 * abs(block.x - original_block.x) - dphase)
-                if pd_value > mvalue:
-                    mblock, mvalue = block.copy(), pd_value
-
-            # 旋转
-            block.rotate()
+        for dphase, block in features.drops(original_block):
+            # 选择全局最大估值
+            pd_value = features.calc_pd(block)
+            pd_value = (pd_value,
+                        -100 * abs(block.x - original_block.x) - dphase)
+            if pd_value > mvalue:
+                mblock, mvalue = block.copy(), pd_value
 
         return mblock
 
@@ -111,6 +224,7 @@ class PierreDellacherie(TetrisAI):
         """
         评估当前局面pd估值
         估值期间block位置不更改
+        逐行逐列完整扫描，作为PDFeatures.calc_pd的参照实现
         """
         # 铺方块
         block_set = self.set_block(block, pool, 1)
@@ -187,8 +301,6 @@ class PDFast(PierreDellacherie):
         if not block:
             return ''
 
-        print(self.phase, self.hmove, self.hcount, self.rcount)
-
         res = ''  # 本回合输出的操作
 
         if self.phase == 3:  # 减速
@@ -227,3 +339,13 @@ class PDFast(PierreDellacherie):
     def event_clear(self, n):
         """ 结束加速，返回评估态 """
         self.phase = 3
+
+
+class PDDrop(TetrisAIDrop, PierreDellacherie):
+    """ 落点版Pierre Dellacherie AI，直接返回最优落点 """
+
+    def evaluate(self, block, pool):
+        if not block:
+            return None
+        mblock = self.get_best_drop(block, pool)
+        return mblock and (mblock.x, mblock.phase)
@@ -0,0 +1,161 @@
+import numpy as np
+from tetris_base import Block
+from tetris_ai_examples import PDDrop
+
+__doc__ = """NumPy批量估值AI
+    依赖numpy，由列高度直接计算当前方块所有落点，以向量化规约批量计算Pierre Dellacherie估值
+    全场地的行、列估值只算一次，各落点仅叠加并重新计算方块覆盖的4行(N, 4, width)与4列(N, 4, height)
+"""
+
+
+class PDNumpy(PDDrop):
+    """ 落点版Pierre Dellacherie AI，全部候选落点批量估值 """
+    ROW_TABLE_WIDTH = 16  # 不超过该宽度时以查表计算行估值
+    SHAPE_ARRAYS = {}  # 类型 -> 各相位格子偏移数组(nphase, 4, 2)
+
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.row_table = None  # 行位整数 -> 行估值
+        if width <= self.ROW_TABLE_WIDTH:
+            self.bits = 1 << np.arange(width)
+            codes = np.arange(1 << width)
+            self.row_table = row_value(codes[:, None] >> np.arange(width) & 1
+                                       == 1)
+
+    def row_values(self, rows):
+        """ 行估值，rows为(..., width) """
+        if self.row_table is None:
+            return row_value(rows)
+        return self.row_table[rows.dot(self.bits)]
+
+    @classmethod
+    def shape_arrays(cls, type):
+        """ 各相位格子偏移(nphase, 4, 2)与最小偏移(nphase, 2) """
+        res = cls.SHAPE_ARRAYS.get(type)
+        if res is None:
+            shapes = np.array(Block.SHAPES[type])
+            res = cls.SHAPE_ARRAYS[type] = shapes, shapes.min(axis=1)
+        return res
+
+    def get_candidates(self, original_block, board, heights):
+        """
+        由列高度与方块底部轮廓计算各相位、各列的直落落点
+        方块处于悬空方块下方时逐行下移，同PDFeatures.drops
+        Returns:
+            [(x, phase, y, dphase), ...]，顺序与get_best_drop遍历顺序一致
+        """
+        res = []
+        block = original_block.copy()
+        y0 = original_block.y
+        for dphase in range(len(Block.SHAPES[block.type])):
+            left, right, masks = Block.MASKS[block.type][block.phase]
+            bottom = Block.BOTTOMS[block.type][block.phase]
+            for tx in range(-left, self.width - right):
+                ty = max(heights[tx + dx] - dy for dx, dy in bottom)
+                if ty > y0:  # 各格低于列表面，初始位置可能相交
+                    if self.collide(board, block, tx, y0):
+                        continue
+                    ty = y0
+                    while not self.collide(board, block, tx, ty - 1):
+                        ty -= 1
+                res.append((tx, block.phase, ty, dphase))
+            block.rotate()
+        return res
+
+    def collide(self, board, block, x, y):
+        """ 判断方块置于(x,y)时是否触底或与场地相交，不检查左右边 """
+        for dx, dy in block:
+            ny = y + dy
+            if ny < 0:
+                return True
+            if ny <= self.height and board[ny, x + dx]:  # 无上界
+                return True
+        return False
+
+    def get_best_drop(self, original_block, pool):
+        """ 批量计算所有落点估值确定最优位置 """
+        board = np.array(list(pool), dtype=bool)
+        height, width = board.shape
+
+        # 场地四周补空行、空列，方块覆盖的行列窗口不越界
+        padded = np.zeros((height + 4, width + 3), dtype=bool)
+        padded[:height, :width] = board
+        # 逐列连续存储，底部补一格方块作为求列高的哨兵
+        padded_cols = np.ones((width + 3, height + 1), dtype=bool)
+        padded_cols[:, 1:] = padded[:height].T
+        col_values, heights = col_value(padded_cols)  # (width+3, )
+
+        candidates = self.get_candidates(original_block, board,
+                                         heights.tolist())
+        if not candidates:
+            return None
+        xs, phases, ys, dphases = np.array(candidates).T
+        row_values = self.row_values(padded[:, :width])  # (height+4, )
+        full_rows = padded[:, :width].all(axis=1)
+
+        # 各落点方块覆盖的4行、4列窗口
+        shapes, low = self.shape_arrays(original_block.type)
+        shapes, low = shapes[phases], low[phases]  # (N, 4, 2), (N, 2)
+        offset = np.arange(4)
+        rows = ys + low[:, 1]
+        cols = xs + low[:, 0]
+        rwin = rows[:, None] + offset  # (N, 4)
+        cwin = cols[:, None] + offset
+
+        # 叠加方块格子
+        cx = xs[:, None] + shapes[:, :, 0]
+        cy = ys[:, None] + shapes[:, :, 1]
+        index = np.arange(len(candidates)).repeat(4).reshape(cx.shape)
+        inside = cy <= self.height  # 无上界
+        index, cx, cy = index[inside], cx[inside], cy[inside]
+        piece = np.zeros((len(candidates), 4, width), dtype=bool)
+        piece[index, cy - rows[index], cx] = True
+        new_rows = padded[rwin, :width] | piece  # (N, 4, width)
+        new_cols = padded_cols[cwin]  # (N, 4, height)
+        new_cols[index, cx - cols[index], cy + 1] = True
+
+        # 消行
+        full = new_rows.all(axis=2)
+        ero1 = full.sum(axis=1)
+        if full_rows.any():  # 场地原有满行
+            ero1 += full_rows.sum() - full_rows[rwin].sum(axis=1)
+        ero2 = (piece.sum(axis=2) * full).sum(axis=1)
+
+        # 未覆盖的行列估值不变，仅计算窗口内的差值
+        pd_value = (-45 * ys + 34 * ero1 * ero2 + row_values.sum() +
+                    col_values[:width].sum() +
+                    (self.row_values(new_rows) - row_values[rwin]).sum(axis=1) +
+                    (col_value(new_cols)[0] - col_values[cwin]).sum(axis=1))
+
+        # 与逐个遍历相同的次序与平局规则: PD值优先，其次操作距离
+        dist = 100 * np.abs(xs - original_block.x) + dphases
+        best = int(np.argmax(pd_value * 1000000 - dist))
+
+        tx, phase, ty, dphase = candidates[best]
+        mblock = original_block.copy()
+        mblock.x, mblock.y, mblock.phase = tx, ty, phase
+        return mblock
+
+
+def row_value(rows):
+    """ 行估值: 行变换与井，左右墙壁视为方块；rows为(..., width) """
+    transitions = (rows[..., 1:] != rows[..., :-1]).sum(axis=-1)
+    empty = ~rows
+    wells = ((empty[..., 1:-1] & rows[..., :-2] & rows[..., 2:]).sum(axis=-1)
+             + (empty[..., 0] & rows[..., 1]) + (empty[..., -1] & rows[..., -2]))
+    return -32 * transitions - 34 * wells
+
+
+def col_value(cols):
+    """
+    列估值: 列变换与空洞
+    cols为(..., 1+height)，自底向上，首格为恒为方块的哨兵
+    Returns:
+        (列估值, 列高)
+    """
+    transitions = (cols[..., 2:] != cols[..., 1:-1]).sum(axis=-1)
+    # 自顶向下首个方块即列高，空列时为哨兵
+    top = cols.shape[-1] - 1 - cols[..., ::-1].argmax(axis=-1)
+    holes = top - (cols.sum(axis=-1) - 1)
+    return -93 * transitions - 79 * holes, top
+
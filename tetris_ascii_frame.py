@@ -1,5 +1,6 @@
 from tkinter import *
 from tkinter.font import Font
+from tetris_scheduler import FrameScheduler
 from tetris_base import TetrisLogicFrame
 
 __doc__ = """ASCII俄罗斯方块-帧更新版
@@ -49,13 +50,21 @@ class TetrisGame:
         self.tk.bind("<Down>", self.logic.control_speedup)
         self.tk.bind("<KeyRelease-Down>", self.logic.control_speeddown)
 
+        # 固定帧率调度，补帧期间只绘制一次
+        self.scheduler = FrameScheduler(self.logic.event_update_frame,
+                                        self.draw, self.updateStep / 1000)
+
         # 启动主循环
         self.draw()
         self.tk.mainloop()
 
     def draw(self):
+        if self.scheduler.busy:  # 补帧结束后统一绘制
+            return
         self.board['text'] = '\n'.join(self.logic.dump_lines())
         self.hud['text'] = self.logic.dump_info()
+        if not self.logic.running:  # 结束时显示帧率统计
+            self.hud['text'] += '\n' + self.scheduler.dump_stats()
 
     def start_game(self):
         self.logic.reset()
@@ -65,6 +74,7 @@ class TetrisGame:
         self.paused = True
         self.toggle_pause()
 
+        self.scheduler.reset()
         self.run_game()
 
     def run_game(self):
@@ -72,12 +82,12 @@ class TetrisGame:
             self.pause_finished = True
             return
 
-        # 更新帧
-        self.logic.event_update_frame()
+        # 按固定帧率执行到期的逻辑帧
+        self.scheduler.advance()
 
         # 游戏继续，触发下一轮更新事件
         if self.logic.running:
-            self.tk.after(self.updateStep, self.run_game)
+            self.tk.after(self.scheduler.delay_ms(), self.run_game)
 
         else:  # 游戏结束
             self.btn_start['state'] = ACTIVE
@@ -91,6 +101,7 @@ class TetrisGame:
         if self.paused:  # 开始记录暂停事件
             self.pause_finished = False
         elif self.pause_finished:  # 重启游戏更新逻辑
+            self.scheduler.resume()
             self.run_game()
 
 
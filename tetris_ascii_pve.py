@@ -1,6 +1,8 @@
 from tkinter import *
 from tkinter.font import Font
-from tetris_base import TetrisLogicVersus, TetrisLogicAuto
+from tetris_scheduler import FrameScheduler
+from tetris_base import TetrisLogicVersus
+from tetris_async import TetrisLogicAsync
 from tetris_ai_examples import PierreDellacherie, PDFast
 
 __doc__ = """ASCII俄罗斯方块-人机对战版
@@ -49,18 +51,24 @@ class TetrisGame:
         self.tk.bind("<Down>", self.logic.control_speedup)
         self.tk.bind("<KeyRelease-Down>", self.logic.control_speeddown)
 
-        # 绑定游戏操作 玩家2(AI)
-        self.logic2 = TetrisLogicAuto(PDFast, self)
+        # 绑定游戏操作 玩家2(AI)，决策在工作线程中进行，不阻塞界面
+        self.logic2 = TetrisLogicAsync(PDFast, self)
 
         # 玩家间绑定对手
         self.logic.opponent = self.logic2
         self.logic2.opponent = self.logic
 
+        # 固定帧率调度，补帧期间只绘制一次
+        self.scheduler = FrameScheduler(self.update_frame, self.draw,
+                                        self.updateStep / 1000)
+
         # 启动主循环
         self.draw()
         self.tk.mainloop()
 
     def draw(self):
+        if self.scheduler.busy:  # 补帧结束后统一绘制
+            return
         board1, board2 = self.logic.dump_lines(), self.logic2.dump_lines()
         self.board['text'] = '\n'.join(
             (x[:-1] + y for x, y in zip(board1, board2)))
@@ -68,6 +76,18 @@ class TetrisGame:
         # hud
         self.hud[
             'text'] = f'{self.logic.dump_info()} || {self.logic2.dump_info()}'
+        if not (self.logic.running and self.logic2.running):
+            # 结束时显示帧率与AI决策耗时统计
+            stats = self.logic2.ai_stats()
+            self.hud['text'] += (
+                f'\n{self.scheduler.dump_stats()}'
+                f' ai:{stats["latency_mean"] * 1000:.1f}'
+                f'/{stats["latency_max"] * 1000:.1f}ms')
+
+    def update_frame(self):
+        """ 双方各更新一帧 """
+        self.logic.event_update_frame()
+        self.logic2.event_update_frame()
 
     def start_game(self):
         self.logic.reset()
@@ -78,6 +98,7 @@ class TetrisGame:
         self.paused = True
         self.toggle_pause()
 
+        self.scheduler.reset()
         self.run_game()
 
     def run_game(self):
@@ -85,13 +106,12 @@ class TetrisGame:
             self.pause_finished = True
             return
 
-        # 更新帧
-        self.logic.event_update_frame()
-        self.logic2.event_update_frame()
+        # 按固定帧率执行到期的逻辑帧
+        self.scheduler.advance()
 
         # 游戏继续，触发下一轮更新事件
         if self.logic.running and self.logic2.running:
-            self.tk.after(self.updateStep, self.run_game)
+            self.tk.after(self.scheduler.delay_ms(), self.run_game)
 
         else:  # 游戏结束
             self.btn_start['state'] = ACTIVE
@@ -106,6 +126,7 @@ class TetrisGame:
         if self.paused:  # 开始记录暂停事件
             self.pause_finished = False
         elif self.pause_finished:  # 重启游戏更新逻辑
+            self.scheduler.resume()
             self.run_game()
 
 
@@ -1,5 +1,6 @@
 from tkinter import *
 from tkinter.font import Font
+from tetris_scheduler import FrameScheduler
 from tetris_base import TetrisLogicVersus
 
 __doc__ = """ASCII俄罗斯方块-对战版
@@ -55,11 +56,17 @@ class TetrisGame:
         self.logic.opponent = self.logic2
         self.logic2.opponent = self.logic
 
+        # 固定帧率调度，补帧期间只绘制一次
+        self.scheduler = FrameScheduler(self.update_frame, self.draw,
+                                        self.updateStep / 1000)
+
         # 启动主循环
         self.draw()
         self.tk.mainloop()
 
     def draw(self):
+        if self.scheduler.busy:  # 补帧结束后统一绘制
+            return
         board1, board2 = self.logic.dump_lines(), self.logic2.dump_lines()
         self.board['text'] = '\n'.join(
             (x[:-1] + y for x, y in zip(board1, board2)))
@@ -67,6 +74,14 @@ class TetrisGame:
         # hud
         self.hud[
             'text'] = f'{self.logic.dump_info()} || {self.logic2.dump_info()}'
+        # 结束时显示帧率统计
+        if not (self.logic.running and self.logic2.running):
+            self.hud['text'] += '\n' + self.scheduler.dump_stats()
+
+    def update_frame(self):
+        """ 双方各更新一帧 """
+        self.logic.event_update_frame()
+        self.logic2.event_update_frame()
 
     def start_game(self):
         self.logic.reset()
@@ -77,6 +92,7 @@ class TetrisGame:
         self.paused = True
         self.toggle_pause()
 
+        self.scheduler.reset()
         self.run_game()
 
     def run_game(self):
@@ -84,13 +100,12 @@ class TetrisGame:
             self.pause_finished = True
             return
 
-        # 更新帧
-        self.logic.event_update_frame()
-        self.logic2.event_update_frame()
+        # 按固定帧率执行到期的逻辑帧
+        self.scheduler.advance()
 
         # 游戏继续，触发下一轮更新事件
         if self.logic.running and self.logic2.running:
-            self.tk.after(self.updateStep, self.run_game)
+            self.tk.after(self.scheduler.delay_ms(), self.run_game)
 
         else:  # 游戏结束
             self.btn_start['state'] = ACTIVE
@@ -105,6 +120,7 @@ class TetrisGame:
         if self.paused:  # 开始记录暂停事件
             self.pause_finished = False
         elif self.pause_finished:  # 重启游戏更新逻辑
+            self.scheduler.resume()
             self.run_game()
 
 
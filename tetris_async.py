@@ -0,0 +1,176 @@
+import time, queue, threading, multiprocessing
+from tetris_base import TetrisLogicVersus, TetrisLogicAuto, TetrisAIDrop
+
+__doc__ = """后台AI决策
+    TetrisLogicAsync将AI的evaluate移至工作线程或子进程执行，游戏逻辑照常逐帧推进
+    决策返回后在下一帧应用；超出时间预算的记为迟到，返回时方块已放置的记为错过并丢弃
+    AI定义time_budget属性时，每次决策前由工作端写入本次预算（秒）
+"""
+
+
+def _serve(AI, requests, results):
+    """
+    工作端主循环，按顺序处理请求直至收到None
+    ('clear', n): 通知行消除
+    ('eval', 序号, 方块, 场地, 预览方块, 时间预算): 执行决策
+    """
+    while True:
+        msg = requests.get()
+        if msg is None:
+            break
+        kind, *args = msg
+        if kind == 'clear':
+            AI.event_clear(*args)
+            continue
+
+        token, block, pool, preview, budget = args
+        start = time.perf_counter()
+        result = error = None
+        try:
+            if hasattr(AI, 'time_budget'):
+                AI.time_budget = budget
+            AI.event_preview(preview)
+            result = AI.evaluate(block, pool)
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        results.put((token, result, error, time.perf_counter() - start))
+
+
+def _serve_process(AI_class, width, height, requests, results):
+    """ 子进程入口，AI实例在子进程内创建 """
+    _serve(AI_class(width, height), requests, results)
+
+
+class TetrisLogicAsync(TetrisLogicAuto):
+    """按帧更新的俄罗斯方块逻辑 后台AI版
+    time_budget: 每次决策的时间预算（秒）
+    process: 为真时在子进程中运行AI，否则在工作线程中运行
+    """
+
+    def __init__(self, AI_class, *a, time_budget=0.05, process=False, **kw):
+        super().__init__(AI_class, *a, **kw)
+
+        self.time_budget = time_budget
+        self.drop_mode = isinstance(self.AI, TetrisAIDrop)
+        self.token = 0  # 决策请求序号
+
+        if process:  # AI_class需可被pickle
+            ctx = multiprocessing.get_context()
+            self.requests, self.results = ctx.Queue(), ctx.Queue()
+            self.worker = ctx.Process(
+                target=_serve_process,
+                args=(AI_class, self.width, self.height, self.requests,
+                      self.results),
+                daemon=True)
+        else:
+            self.requests, self.results = queue.Queue(), queue.Queue()
+            self.worker = threading.Thread(
+                target=_serve,
+                args=(self.AI, self.requests, self.results),
+                daemon=True)
+        self.worker.start()
+
+    def reset(self):
+        """ 开局，丢弃未返回的决策 """
+        super().reset()
+        self.pending = None  # 未返回的请求 (序号, 方块序号)
+
+        # 决策统计
+        self.ai_requests = 0  # 已发出请求数
+        self.ai_decisions = 0  # 已应用决策数
+        self.ai_late = 0  # 超出时间预算的决策数
+        self.ai_missed = 0  # 返回时方块已放置而丢弃的决策数
+        self.ai_errors = 0
+        self.ai_latency = 0.0  # 累计决策耗时
+        self.ai_latency_max = 0.0
+
+    def restore(self, snap):
+        """ 恢复局面，丢弃基于原局面的未返回决策 """
+        super().restore(snap)
+        self.pending = None
+
+    def event_update_frame(self):
+        """ 按帧更新，AI决策不阻塞本帧 """
+        TetrisLogicVersus.event_update_frame(self)
+        self.poll_ai()
+
+        self.ai_frame_counter -= 1
+        if self.ai_frame_counter <= 0 and not self.pending:
+            self.ai_frame_counter = (self.NFRAME_AI_DROP
+                                     if self.drop_mode else self.NFRAME_AI)
+            self.request_ai()
+
+    def request_ai(self):
+        """ 以当前局面向工作端发出决策请求 """
+        if not self.running or self.paused:
+            return
+        if self.drop_mode and not self.curr_block:
+            return
+        self.token += 1
+        self.pending = self.token, self.block_count
+        self.ai_requests += 1
+        self.requests.put(('eval', self.token, self.curr_block
+                           and self.curr_block.copy(), self.pool.copy(),
+                           [x.copy() for x in self.next_block],
+                           self.time_budget))
+
+    def poll_ai(self):
+        """ 取回已完成的决策，方块未变时应用 """
+        while self.pending:
+            try:
+                token, result, error, elapsed = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if token != self.pending[0]:  # 开局或恢复局面前的过期结果
+                continue
+            block_count = self.pending[1]
+            self.pending = None
+
+            self.ai_latency += elapsed
+            self.ai_latency_max = max(self.ai_latency_max, elapsed)
+            if elapsed > self.time_budget:
+                self.ai_late += 1
+            if error:
+                self.ai_errors += 1
+                print(f'AI ERROR|{error}')
+                return
+            if block_count != self.block_count or not self.curr_block:
+                self.ai_missed += 1
+                return
+
+            self.ai_decisions += 1
+            try:
+                if self.drop_mode:
+                    self.apply_drop(result)
+                else:
+                    self.apply_keys(result)
+            except Exception as e:
+                print(f'AI ERROR|{type(e).__name__}: {e}')
+
+    def event_clear(self, n):
+        """ 经请求队列通知AI行消除，保持与决策的先后顺序 """
+        TetrisLogicVersus.event_clear(self, n)
+        self.requests.put(('clear', n))
+
+    def ai_stats(self):
+        """ 返回决策统计字典，耗时单位为秒 """
+        done = self.ai_requests - bool(self.pending)
+        return {
+            'requests': self.ai_requests,
+            'decisions': self.ai_decisions,
+            'late': self.ai_late,
+            'missed': self.ai_missed,
+            'errors': self.ai_errors,
+            'latency_mean': self.ai_latency / max(done, 1),
+            'latency_max': self.ai_latency_max,
+        }
+
+    def dump_info(self):
+        """ 状态说明附加迟到/错过的决策数 """
+        return (f'{super().dump_info()}'
+                f' late:{self.ai_late} miss:{self.ai_missed}')
+
+    def close(self):
+        """ 结束工作端 """
+        self.requests.put(None)
+        self.worker.join()
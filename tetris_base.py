@@ -1,37 +1,85 @@
-import random, time
+import random, time, collections
 
 
 class RandSeq:
     """
     确定随机序列生成器
+    每个实例持有独立的random.Random流，不读写全局random模块状态
+    同一种子与生成函数总得到同一序列，与同进程内其它游戏互不影响
+    随机值按批预生成至定长环形缓冲，依次取出
     """
     BATCH = 100
     SEED = time.time()
 
-    def __init__(self, func, seed=None):
-        self.pool = []
+    def __init__(self, func, seed=None, batch=None):
         self.seed = self.SEED if seed is None else seed
-        self.func = func
-        self.gen_rand()
+        self.func = func  # 生成函数，接收random.Random实例
+        self.rng = random.Random(self.seed)
+        self.pool = [None] * (batch or self.BATCH)  # 环形缓冲
+        self.index = len(self.pool)  # 下一个取出位置
+        self.batch = None  # 当前批次的不可变状态，供快照共享
 
     def gen_rand(self):
-        """ 一次性生成下一轮随机序列与新的种子 """
-        random.seed(self.seed)
-        self.seed = random.random()
-        for i in range(self.BATCH):
-            self.pool.append(self.func())
+        """ 批量生成下一轮随机序列，覆盖缓冲 """
+        func, rng, pool = self.func, self.rng, self.pool
+        for i in range(len(pool)):
+            pool[i] = func(rng)
+        self.index = 0
 
     def pop(self):
         """ 获取下一个随机值 """
-        if not self.pool:
+        if self.index >= len(self.pool):
             self.gen_rand()
-        return self.pool.pop()
+            self.batch = None
+        value = self.pool[self.index]
+        self.index += 1
+        return value
+
+    def snapshot(self):
+        """
+        返回当前位置的不可变状态
+        随机流与缓冲仅在换批时改变，同一批次内的快照共享同一批次状态
+        """
+        if self.batch is None:
+            self.batch = (self.rng.getstate(),
+                          tuple(x.copy() if isinstance(x, Block) else x
+                                for x in self.pool), self.snapshot_extra())
+        return self.batch, self.index
+
+    def restore(self, state):
+        """ 恢复至snapshot返回的状态 """
+        batch, index = state
+        rng_state, values, extra = batch
+        if batch is not self.batch:  # 不同批次，恢复随机流与缓冲
+            self.rng.setstate(rng_state)
+            self.restore_extra(extra)
+            self.batch = batch
+            self.pool = list(values)
+            start, stop = index, len(values)
+        else:  # 同批次内仅index之后已取出的方块可能被修改
+            start, stop = index, self.index
+        # 取出的方块会被修改，待取出的须为副本
+        pool = self.pool
+        for i in range(start, stop):
+            if isinstance(values[i], Block):
+                pool[i] = values[i].copy()
+        self.index = index
+
+    def snapshot_extra(self):
+        """ 子类在换批时改变的附加状态 """
+        return None
+
+    def restore_extra(self, extra):
+        pass
 
 
 class Block:
     """
     方块类
+    各类型、各相位的格子偏移与行掩码预先计算为静态表，
+    实例仅记录(type, phase, x, y)
     """
+    __slots__ = ('type', 'phase', 'x', 'y')
 
     BLOCK_NAMES = 'JLTIZSO'
     BLOCKS = [
@@ -44,71 +92,626 @@ class Block:
         ((0, 1), (1, 0), (1, 1)),  # O
     ]
 
+    SHAPES = {}  # 类型 -> 各相位所有块相对中心偏移
+    MASKS = {}  # 类型 -> 各相位(最左偏移, 最右偏移, ((dy, 行掩码), ...))，掩码以最左格为第0位
+    ROTATES = {}  # 类型 -> (反旋转, 正旋转)相位转移表
+    BOTTOMS = {}  # 类型 -> 各相位底部轮廓((dx, 该列最低dy), ...)
+
     @classmethod
-    def get(cls):
-        """ 随机获取方块 """
-        return cls(random.randrange(7))
+    def get(cls, rng=random):
+        """ 随机获取方块，rng默认为全局random模块 """
+        return cls(rng.randrange(7))
 
     def __init__(self, type):
         self.type = self.BLOCK_NAMES[type]  # 块类型
-        self.outers = self.BLOCKS[type]  # 中心块以外
         self.x = self.y = 0
         self.phase = 0  # 旋转相位
 
     def rotate(self, back=False):
-        if self.type == 'O':  # 2*2不旋转
-            return
-        if self.type in 'IZS' and not (self.phase ^ back):  # 中心对称方块
-            back = not back
-
-        if back:  # 正旋转
-            self.phase += 1
-            self.outers = tuple((y, -x) for x, y in self.outers)
-        else:  # 反旋转
-            self.phase -= 1
-            self.outers = tuple((-y, x) for x, y in self.outers)
-
-        self.phase %= 4
+        self.phase = self.ROTATES[self.type][back][self.phase]
 
     def copy(self):
         """ 复制当前块 """
-        block = Block(self.BLOCK_NAMES.index(self.type))
-        while block.phase != self.phase:
-            block.rotate()
+        block = Block.__new__(Block)
+        block.type, block.phase = self.type, self.phase
         block.x, block.y = self.x, self.y
         return block
 
+    @property
+    def state(self):
+        """ 不可变状态(type, phase, x, y) """
+        return self.type, self.phase, self.x, self.y
+
+    @classmethod
+    def from_state(cls, state):
+        """ 由state还原方块 """
+        block = cls.__new__(cls)
+        block.type, block.phase, block.x, block.y = state
+        return block
+
+    @property
+    def outers(self):
+        """ 中心块以外 """
+        return self.SHAPES[self.type][self.phase][1:]
+
     def __iter__(self):
         """ 迭代获取所有块相对中心位置偏移 """
-        yield (0, 0)
-        yield from self.outers
+        return iter(self.SHAPES[self.type][self.phase])
+
+
+def _build_block_tables():
+    """ 预计算方块旋转表 """
+    for name, outers in zip(Block.BLOCK_NAMES, Block.BLOCKS):
+        # 相位数: O不旋转，IZS中心对称仅两相位
+        nphase = 1 if name == 'O' else 2 if name in 'IZS' else 4
+
+        shapes, masks, bottoms = [], [], []
+        for phase in range(nphase):
+            shape = ((0, 0), ) + outers
+            shapes.append(shape)
+            outers = tuple((y, -x) for x, y in outers)  # 正旋转
+
+            left = min(x for x, y in shape)
+            rows = {}
+            for x, y in shape:
+                rows[y] = rows.get(y, 0) | 1 << (x - left)
+            masks.append((left, max(x for x, y in shape),
+                          tuple(sorted(rows.items()))))
+
+            bottom = {}
+            for x, y in shape:
+                bottom[x] = min(bottom.get(x, y), y)
+            bottoms.append(tuple(sorted(bottom.items())))
+        Block.SHAPES[name] = tuple(shapes)
+        Block.MASKS[name] = tuple(masks)
+        Block.BOTTOMS[name] = tuple(bottoms)
+
+        # 正旋转相位+1，反旋转相位-1；两相位方块来回切换
+        Block.ROTATES[name] = (
+            tuple((p - 1) % nphase for p in range(nphase)),
+            tuple((p + 1) % nphase for p in range(nphase)),
+        )
+
+
+_build_block_tables()
+
+
+class BagSeq(RandSeq):
+    """
+    袋式方块序列
+    每袋含各类方块copies个并随机排列，copies=1即7-bag，copies=2即14-bag
+    """
+
+    def __init__(self, seed=None, copies=1, batch=None):
+        self.copies = copies
+        bag = 7 * copies
+        nbag = max((batch or self.BATCH) // bag, 1)  # 缓冲长度取整袋
+        super().__init__(Block, seed, bag * nbag)
+
+    def gen_rand(self):
+        """ 批量生成整袋方块 """
+        rng, pool = self.rng, self.pool
+        bag = list(range(7)) * self.copies
+        for i in range(0, len(pool), len(bag)):
+            rng.shuffle(bag)
+            pool[i:i + len(bag)] = map(Block, bag)
+        self.index = 0
+
+
+class HistorySeq(RandSeq):
+    """
+    历史记录方块序列
+    抽取方块与最近size个方块重复时重抽，至多抽rolls次
+    """
+
+    def __init__(self, seed=None, size=4, rolls=4, batch=None):
+        super().__init__(Block, seed, batch)
+        self.history = ([4, 5] * size)[-size:] if size else []  # 初始为交替的Z、S
+        self.rolls = rolls
+
+    def gen_rand(self):
+        """ 批量生成方块并更新历史 """
+        rng, pool, history = self.rng, self.pool, self.history
+        for i in range(len(pool)):
+            for _ in range(self.rolls):
+                type = rng.randrange(7)
+                if type not in history:
+                    break
+            if history:
+                history.pop(0)
+                history.append(type)
+            pool[i] = Block(type)
+        self.index = 0
+
+    def snapshot_extra(self):
+        return tuple(self.history)
+
+    def restore_extra(self, extra):
+        self.history = list(extra)
+
+
+class FixedSeq(RandSeq):
+    """
+    固定方块序列
+    按给定方块名循环输出，忽略种子
+    """
+
+    def __init__(self, names, seed=None, batch=None):
+        self.types = [Block.BLOCK_NAMES.index(name) for name in names]
+        if not self.types:
+            raise ValueError('empty block sequence')
+        self.pos = 0  # 序列读取位置
+        super().__init__(Block, seed, batch)
+
+    @classmethod
+    def from_file(cls, path, seed=None):
+        """ 自文本文件读取方块名，忽略空白字符 """
+        with open(path) as f:
+            return cls(''.join(f.read().split()), seed)
+
+    def gen_rand(self):
+        """ 批量截取下一段序列 """
+        types, pool = self.types, self.pool
+        for i in range(len(pool)):
+            pool[i] = Block(types[self.pos])
+            self.pos = (self.pos + 1) % len(types)
+        self.index = 0
+
+    def snapshot_extra(self):
+        return self.pos
+
+    def restore_extra(self, extra):
+        self.pos = extra
+
+
+# 方块序列生成器: 名称 -> 接收种子返回序列的函数
+BLOCK_GENERATORS = {
+    'uniform': lambda seed: RandSeq(Block.get, seed),
+    '7bag': lambda seed: BagSeq(seed),
+    '14bag': lambda seed: BagSeq(seed, copies=2),
+    'history': lambda seed: HistorySeq(seed),
+}
+
+
+def make_block_seq(generator, seed=None):
+    """
+    创建方块序列
+    generator: BLOCK_GENERATORS中的名称、'file:路径'，或接收种子返回序列的函数
+    """
+    if callable(generator):
+        return generator(seed)
+    if generator.startswith('file:'):
+        return FixedSeq.from_file(generator[5:], seed)
+    if generator not in BLOCK_GENERATORS:
+        raise ValueError(f'unknown block generator: {generator}')
+    return BLOCK_GENERATORS[generator](seed)
+
+
+class ColumnHeights:
+    """
+    基于各列表面高度的公共方法，与场地存储方式无关
+    子类需提供height、heights与collide
+    """
+    __slots__ = ()
+
+    def drop_y(self, block, x, y):
+        """
+        方块自(x,y)竖直下落的落点y坐标
+        方块位于各列表面以上时由列高度与底部轮廓直接求得，否则逐行下移
+        """
+        land = max(self.heights[x + dx] - dy
+                   for dx, dy in Block.BOTTOMS[block.type][block.phase])
+        if land <= y:
+            return land
+        while not self.collide(block, x, y - 1):  # 处于悬空方块下方
+            y -= 1
+        return y
+
+    def raise_heights(self, line):
+        """ 底部插入line后更新各列表面高度，超出顶行的部分已移出 """
+        top = self.height + 1
+        self.heights = [
+            min(h + 1, top) if h else int(bool(cell))
+            for h, cell in zip(self.heights, line)
+        ]
+
+
+class Pool(ColumnHeights, list):
+    """
+    列表场地
+    逐行存储0/1列表，共height+1行，顶行用于判断死亡
+    heights记录各列表面高度，仅在通过本类方法修改场地时维护
+    """
+
+    def __init__(self, width, height):
+        super().__init__([0] * width for _ in range(height + 1))
+        self.width, self.height = width, height
+        self.heights = [0] * width  # 各列表面高度
+
+    def collide(self, block, x, y):
+        """ 判断方块置于(x,y)时是否越界或与场地相交 """
+        for dx, dy in block:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny):  # 左右底边
+                return True
+            if ny > self.height:  # 无上界
+                continue
+            if self[ny][nx]:
+                return True
+        return False
+
+    def place(self, block):
+        """ 将方块写入场地 """
+        heights = self.heights
+        for dx, dy in block:
+            x, y = block.x + dx, block.y + dy
+            if y <= self.height:
+                self[y][x] = 1
+                if y >= heights[x]:
+                    heights[x] = y + 1
+
+    def clear_lines(self):
+        """ 消除满行，返回消除行数 """
+        self[:] = [line for line in self if sum(line) < self.width]
+        nline = self.height + 1 - len(self)
+        for _ in range(nline):
+            self.append([0] * self.width)
+        if nline:
+            self.update_heights()
+        return nline
+
+    def add_line(self, line):
+        """ 底部插入一行，顶行移出 """
+        self.insert(0, list(line))
+        self.pop()
+        self.raise_heights(line)
+
+    def update_heights(self):
+        """ 重新计算各列表面高度 """
+        self.heights = [0] * self.width
+        for x in range(self.width):
+            for y in range(self.height, -1, -1):
+                if self[y][x]:
+                    self.heights[x] = y + 1
+                    break
+
+    def overflow(self):
+        """ 顶行存在方块即死亡 """
+        return any(self[-1])
+
+    def copy(self):
+        """ 返回逐行列表副本 """
+        return [x[:] for x in self]
+
+    def snapshot(self):
+        """ 返回场地的不可变状态 """
+        return tuple(map(tuple, self)), tuple(self.heights)
+
+    def restore(self, state):
+        """ 原地恢复至snapshot返回的状态 """
+        rows, heights = state
+        self[:] = map(list, rows)
+        self.heights = list(heights)
+
+
+class BitRow:
+    """
+    位场地的单行兼容视图
+    支持下标读写、切片、迭代，行为与0/1列表一致
+    """
+    __slots__ = ('rows', 'y', 'width')
+
+    def __init__(self, rows, y, width):
+        self.rows, self.y, self.width = rows, y, width
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        row = self.rows[self.y]
+        for x in range(self.width):
+            yield row >> x & 1
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return list(self)[x]
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('row index out of range')
+        return self.rows[self.y] >> x & 1
+
+    def __setitem__(self, x, value):
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('row index out of range')
+        if value:
+            self.rows[self.y] |= 1 << x
+        else:
+            self.rows[self.y] &= ~(1 << x)
+
+
+class BitPool(ColumnHeights):
+    """
+    位场地
+    每行存储为一个整数，第x列对应第x位
+    碰撞、满行判断与加行均为位运算；通过BitRow提供与Pool一致的下标访问
+    """
+    __slots__ = ('width', 'height', 'full', 'rows', 'heights')
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.full = (1 << width) - 1  # 满行掩码
+        self.rows = [0] * (height + 1)
+        self.heights = [0] * width  # 各列表面高度
+
+    def __len__(self):
+        return self.height + 1
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height + 1
+        if not 0 <= y <= self.height:
+            raise IndexError('pool index out of range')
+        return BitRow(self.rows, y, self.width)
+
+    def __iter__(self):
+        for y in range(self.height + 1):
+            yield BitRow(self.rows, y, self.width)
+
+    def collide(self, block, x, y):
+        """ 判断方块置于(x,y)时是否越界或与场地相交 """
+        left, right, masks = Block.MASKS[block.type][block.phase]
+        x += left
+        if x < 0 or x + right - left >= self.width:  # 左右边
+            return True
+        rows, top = self.rows, self.height
+        for dy, mask in masks:
+            ny = y + dy
+            if ny < 0:  # 底边
+                return True
+            if ny <= top and rows[ny] & mask << x:  # 无上界
+                return True
+        return False
+
+    def place(self, block):
+        """ 将方块写入场地 """
+        left, right, masks = Block.MASKS[block.type][block.phase]
+        x = block.x + left
+        rows, top = self.rows, self.height
+        for dy, mask in masks:
+            y = block.y + dy
+            if y <= top:
+                rows[y] |= mask << x
+        heights = self.heights
+        for dx, dy in block:
+            x, y = block.x + dx, block.y + dy
+            if y <= top and y >= heights[x]:
+                heights[x] = y + 1
+
+    def clear_lines(self):
+        """ 消除满行，返回消除行数 """
+        full = self.full
+        if full not in self.rows:
+            return 0
+        rows = [row for row in self.rows if row != full]
+        nline = self.height + 1 - len(rows)
+        rows.extend([0] * nline)
+        self.rows[:] = rows
+        self.update_heights()
+        return nline
+
+    def add_line(self, line):
+        """ 底部插入一行，顶行移出 """
+        self.rows.insert(0, sum(1 << x for x, cell in enumerate(line) if cell))
+        self.rows.pop()
+        self.raise_heights(line)
+
+    def update_heights(self):
+        """ 自顶向下重新计算各列表面高度 """
+        heights = [0] * self.width
+        rest = self.full  # 尚未确定高度的列
+        for y in range(self.height, -1, -1):
+            found = self.rows[y] & rest
+            while found:
+                low = found & -found
+                heights[low.bit_length() - 1] = y + 1
+                found ^= low
+            rest &= ~self.rows[y]
+            if not rest:
+                break
+        self.heights = heights
+
+    def overflow(self):
+        """ 顶行存在方块即死亡 """
+        return self.rows[-1] != 0
+
+    def copy(self):
+        """ 返回逐行列表副本 """
+        width = self.width
+        return [[row >> x & 1 for x in range(width)] for row in self.rows]
+
+    def snapshot(self):
+        """ 返回场地的不可变状态 """
+        return tuple(self.rows), tuple(self.heights)
+
+    def restore(self, state):
+        """ 原地恢复至snapshot返回的状态 """
+        rows, heights = state
+        self.rows[:] = rows
+        self.heights = list(heights)
+
+
+class BytePool(ColumnHeights):
+    """
+    字节场地
+    所有格子按行连续存储于一个bytearray，第y行第x列位于y*width+x
+    缓冲区在整局中原地修改、长度不变，可通过view()零拷贝导出只读视图
+    """
+    __slots__ = ('width', 'height', 'buf', 'heights')
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.buf = bytearray(width * (height + 1))
+        self.heights = [0] * width  # 各列表面高度
+
+    def __len__(self):
+        return self.height + 1
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height + 1
+        if not 0 <= y <= self.height:
+            raise IndexError('pool index out of range')
+        return memoryview(self.buf)[y * self.width:(y + 1) * self.width]
+
+    def __iter__(self):
+        for y in range(self.height + 1):
+            yield self[y]
+
+    def view(self):
+        """ 返回(height+1, width)的只读memoryview，随场地实时变化 """
+        return memoryview(self.buf).toreadonly().cast(
+            'B', (self.height + 1, self.width))
+
+    def collide(self, block, x, y):
+        """ 判断方块置于(x,y)时是否越界或与场地相交 """
+        buf, width = self.buf, self.width
+        for dx, dy in block:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny):  # 左右底边
+                return True
+            if ny > self.height:  # 无上界
+                continue
+            if buf[ny * width + nx]:
+                return True
+        return False
+
+    def place(self, block):
+        """ 将方块写入场地 """
+        buf, width, heights = self.buf, self.width, self.heights
+        for dx, dy in block:
+            x, y = block.x + dx, block.y + dy
+            if y <= self.height:
+                buf[y * width + x] = 1
+                if y >= heights[x]:
+                    heights[x] = y + 1
+
+    def clear_lines(self):
+        """ 消除满行，返回消除行数 """
+        width = self.width
+        rows = [
+            self.buf[y:y + width] for y in range(0, len(self.buf), width)
+        ]
+        rest = [row for row in rows if 0 in row]
+        nline = len(rows) - len(rest)
+        if nline:
+            rest.append(bytes(width * nline))
+            self.buf[:] = b''.join(rest)  # 等长原地替换，保持导出视图有效
+            self.update_heights()
+        return nline
+
+    def add_line(self, line):
+        """ 底部插入一行，顶行移出 """
+        width = self.width
+        self.buf[width:] = self.buf[:-width]
+        self.buf[:width] = bytes(1 if cell else 0 for cell in line)
+        self.raise_heights(line)
+
+    def update_heights(self):
+        """ 重新计算各列表面高度 """
+        buf, width = self.buf, self.width
+        self.heights = [0] * width
+        for x in range(width):
+            for y in range(self.height, -1, -1):
+                if buf[y * width + x]:
+                    self.heights[x] = y + 1
+                    break
+
+    def overflow(self):
+        """ 顶行存在方块即死亡 """
+        return any(self.buf[-self.width:])
+
+    def copy(self):
+        """ 返回逐行列表副本 """
+        width = self.width
+        return [
+            list(self.buf[y:y + width]) for y in range(0, len(self.buf), width)
+        ]
+
+    def snapshot(self):
+        """ 返回场地的不可变状态 """
+        return bytes(self.buf), tuple(self.heights)
+
+    def restore(self, state):
+        """ 原地恢复至snapshot返回的状态，已导出的视图仍然有效 """
+        buf, heights = state
+        self.buf[:] = buf
+        self.heights = list(heights)
 
 
 class TetrisDraw:
     """
     游戏绘制类
     dump_*: 输出文本
+    场地各行的文本逐行缓存，仅重绘方块移动经过、放置、消行与加行涉及的行
     """
 
+    def invalidate_lines(self, rows=None):
+        """ 标记需重绘的场地行，rows为None时全部重绘 """
+        if rows is None:
+            self.line_cache = [None] * self.height
+            return
+        cache = self.line_cache
+        for y in rows:
+            if 0 <= y < self.height:
+                cache[y] = None
+
     def dump_lines(self):
         """ 将游戏场地逐行返回为字符串列表 """
-        lines = ['==' * (1 + self.width)]
+        border = '==' * (1 + self.width)
         if not self.running:
-            lines[0] = 'GAME  OVER'.center(2 + 2 * self.width, '=')
-        pool_tmp = [['[]' if x else '  ' for x in self.pool[i]]
-                    for i in range(self.height)]
-        if self.curr_block:
-            for pos in self.curr_block:
-                x = pos[0] + self.curr_block.x
-                y = pos[1] + self.curr_block.y
-                if y >= self.height:
-                    continue
-                pool_tmp[y][x] = '<>'
-        lines.extend(('|%s|' % (''.join(x))) for x in reversed(pool_tmp))
-        lines.append(lines[0])
-
+            border = 'GAME  OVER'.center(2 + 2 * self.width, '=')
+
+        # 当前方块位置变化涉及的行
+        cells = set()
+        block = self.curr_block
+        if block:
+            cells = {(block.x + dx, block.y + dy)
+                     for dx, dy in block if block.y + dy < self.height}
+        self.invalidate_lines(y for x, y in cells ^ self.drawn_cells)
+        self.drawn_cells = cells
+
+        # 重绘失效行，记录变化的输出行号
+        cache, changed = self.line_cache, []
+        for y in range(self.height):
+            if cache[y] is None:
+                line = ['[]' if x else '  ' for x in self.pool[y]]
+                for x, cy in cells:
+                    if cy == y:
+                        line[x] = '<>'
+                cache[y] = '|%s|' % ''.join(line)
+                changed.append(self.height - y)
+        if border != self.drawn_border:
+            changed.extend((0, self.height + 1))
+            self.drawn_border = border
+        self.line_diff = sorted(changed)
+
+        lines = [border]
+        lines.extend(reversed(cache))
+        lines.append(border)
         return lines
 
+    def dump_diff(self):
+        """
+        返回自上次dump_lines/dump_diff以来变化的行
+        Returns:
+            [(行号, 文本), ...]，行号与dump_lines结果对应
+        """
+        lines = self.dump_lines()
+        return [(i, lines[i]) for i in self.line_diff]
+
     def dump_info(self):
         """ 返回当前游戏状态说明文字 """
         res = f'score:{self.score}'
@@ -120,6 +723,10 @@ class TetrisDraw:
         return res
 
 
+LogicSnapshot = collections.namedtuple(
+    'LogicSnapshot', 'fields board block next block_seq grow_seq')
+
+
 class TetrisLogic(TetrisDraw):
     """
     游戏逻辑类
@@ -127,29 +734,49 @@ class TetrisLogic(TetrisDraw):
     control_*: 游戏玩家操作
     event_*: 游戏事件
     """
-
-    def __init__(self, size=(10, 20), seed=None):
+    # snapshot保存的标量属性，子类追加
+    SNAPSHOT_FIELDS = ('running', 'paused', 'block_settled', 'score', 'lines',
+                       'block_count')
+
+    def __init__(self,
+                 size=(10, 20),
+                 seed=None,
+                 bitboard=False,
+                 generator='uniform',
+                 pool_type=None):
         self.width, self.height = size  # 场地宽高（格）
         self.seed = seed  # 随机种子
+        self.pool_type = pool_type or (BitPool
+                                       if bitboard else Pool)  # 场地存储方式
+        self.generator = generator  # 方块序列生成器，见make_block_seq
         self.reset()
 
     def reset(self):
         """ 开局 """
         self.running = True  # 玩家尚未死亡
         self.paused = False  # 暂停模式，屏蔽玩家操作
-        self.pool = [[0] * self.width
-                     for _ in range(self.height + 1)]  # 游戏场地，顶行用于判断死亡
+        self.pool = self.pool_type(self.width,
+                                   self.height)  # 游戏场地，顶行用于判断死亡
         self.curr_block = None  # 当前方块
         self.block_settled = False  # 游戏逻辑中下回合放置当前控制方块
         self.score = 0
+        self.lines = 0  # 已消除行数
+        self.block_count = 0  # 已生成方块数
+        self.board_state = None  # (场地, 场地快照) 场地未变时各快照共享
+
+        # 绘制缓存
+        self.invalidate_lines()  # 逐行文本缓存
+        self.drawn_cells = set()  # 上次绘制的当前方块格子
+        self.drawn_border = None  # 上次绘制的边框
+        self.line_diff = []  # 上次绘制变化的行号
 
         # 生成方块序列
-        self.block_seq = RandSeq(Block.get, self.seed)
+        self.block_seq = make_block_seq(self.generator, self.seed)
         self.next_block = [self.block_seq.pop(), self.block_seq.pop()]
 
         # 底部出行序列
         self.grow_seq = RandSeq(
-            lambda: [random.random() > 0.3 for i in range(self.width)],
+            lambda rng: [rng.random() > 0.3 for i in range(self.width)],
             self.seed)
 
     def try_move(self, new_pos):
@@ -158,15 +785,7 @@ class TetrisLogic(TetrisDraw):
             return False
 
         # 判断场地相交
-        try:
-            for offset in self.curr_block:
-                nx, ny = tuple(a + b for a, b in zip(offset, new_pos))
-                assert 0 <= nx < self.width and 0 <= ny  # 左右底边
-                if ny > self.height:  # 无上界
-                    continue
-                if self.pool[ny][nx]:
-                    return False
-        except (IndexError, AssertionError):
+        if self.pool.collide(self.curr_block, *new_pos):
             return False
 
         # 移动方块
@@ -191,6 +810,39 @@ class TetrisLogic(TetrisDraw):
         self.curr_block.rotate(not back)
         return False
 
+    def try_drop(self, x, phase):
+        """
+        判断方块能否原地旋转至phase、平移至x列后直接落底
+        不可达时方块位置复原
+        """
+        block = self.curr_block
+        if not block:
+            return False
+        origin = block.x, block.y, block.phase
+        phase %= len(Block.SHAPES[block.type])
+
+        # 场外不可旋转，先下落至场内
+        while block.phase != phase and block.y >= self.height:
+            if not self.try_move((block.x, block.y - 1)):
+                break
+        # 旋转
+        while block.phase != phase:
+            if not self.try_rotate():
+                break
+        # 平移
+        step = 1 if x > block.x else -1
+        while block.phase == phase and block.x != x:
+            if not self.try_move((block.x + step, block.y)):
+                break
+
+        if block.phase != phase or block.x != x:  # 不可达，复原
+            block.x, block.y, block.phase = origin
+            return False
+
+        # 落底
+        block.y = self.pool.drop_y(block, block.x, block.y)
+        return True
+
     def control_left(self, *a):
         if not self.curr_block or self.paused:
             return
@@ -212,6 +864,16 @@ class TetrisLogic(TetrisDraw):
             self.block_settled = False
             self.event_draw()
 
+    def control_drop(self, x, phase):
+        """ 将当前方块移至(x, phase)后直接落底并放置，返回是否成功 """
+        if not self.curr_block or self.paused:
+            return False
+        if not self.try_drop(x, phase):
+            return False
+        self.block_settled = True
+        self.event_update()
+        return True
+
     def control_swap(self, *a):
         if self.paused:
             return
@@ -223,8 +885,9 @@ class TetrisLogic(TetrisDraw):
         tmp = self.grow_seq.pop()
         while not 0 < sum(tmp) < self.width:  # 防止生成空行/满行
             tmp = self.grow_seq.pop()
-        self.pool.insert(0, tmp)
-        self.pool.pop()
+        self.pool.add_line(tmp)
+        self.board_state = None
+        self.invalidate_lines()
         if self.curr_block:
             self.curr_block.y += 1
 
@@ -234,6 +897,7 @@ class TetrisLogic(TetrisDraw):
 
     def event_clear(self, nline):
         """ 行消除 """
+        self.lines += nline
         self.score += nline * nline
 
     def event_update(self):
@@ -244,24 +908,20 @@ class TetrisLogic(TetrisDraw):
         # 方块逻辑
         if self.curr_block:
             if self.block_settled:  # 本回合放置方块
-                for pos in self.curr_block:
-                    x = pos[0] + self.curr_block.x
-                    y = pos[1] + self.curr_block.y
-                    if y <= self.height:
-                        self.pool[y][x] = 1
+                self.pool.place(self.curr_block)
+                self.board_state = None
+                self.invalidate_lines(self.curr_block.y + dy
+                                      for dx, dy in self.curr_block)
                 self.curr_block = None
 
                 # 消行
-                self.pool = [
-                    line for line in self.pool if sum(line) < self.width
-                ]
-                nline = self.height + 1 - len(self.pool)
-                for _ in range(nline):
-                    self.pool.append([0] * self.width)
+                nline = self.pool.clear_lines()
+                if nline:
+                    self.invalidate_lines()
                 self.event_clear(nline)
 
                 # 终局判断
-                if any(self.pool[-1]):
+                if self.pool.overflow():
                     self.running = 0
                     return self.event_end()
 
@@ -272,15 +932,54 @@ class TetrisLogic(TetrisDraw):
 
         # 方块生成
         if not self.curr_block:
+            self.event_spawn()
             self.curr_block = self.next_block.pop(0)
             self.next_block.append(self.block_seq.pop())
             self.curr_block.x = self.width // 2
             self.curr_block.y = self.height
             self.block_settled = False
+            self.block_count += 1
 
         # 绘制事件
         self.event_draw()
 
+    def event_spawn(self):
+        """ 生成新方块前的事件 """
+        pass
+
+    def snapshot(self):
+        """
+        返回当前局面的不可变快照，可多次restore分支推演
+        包含场地、当前与预览方块、方块与出行序列的随机位置及SNAPSHOT_FIELDS各项
+        场地与随机序列在两次快照间未变时共享同一对象
+        不包含AI内部状态与对手等外部关联
+        """
+        board = self.board_state
+        if board is None or board[0] is not self.pool:
+            board = self.board_state = self.pool, self.pool.snapshot()
+        block = self.curr_block
+        return LogicSnapshot(
+            tuple(getattr(self, name) for name in self.SNAPSHOT_FIELDS),
+            board[1], block and block.state,
+            tuple(x.state for x in self.next_block), self.block_seq.snapshot(),
+            self.grow_seq.snapshot())
+
+    def restore(self, snap):
+        """ 恢复至snapshot返回的局面，场地原地恢复 """
+        for name, value in zip(self.SNAPSHOT_FIELDS, snap.fields):
+            setattr(self, name, value)
+        self.pool.restore(snap.board)
+        self.board_state = self.pool, snap.board
+        self.curr_block = snap.block and Block.from_state(snap.block)
+        self.next_block = [Block.from_state(x) for x in snap.next]
+        self.block_seq.restore(snap.block_seq)
+        self.grow_seq.restore(snap.grow_seq)
+
+        # 绘制缓存全部失效
+        self.invalidate_lines()
+        self.drawn_cells = set()
+        self.drawn_border = None
+
     def event_end(self):
         """ 游戏结束事件 """
         pass
@@ -290,11 +989,13 @@ class TetrisLogicFrame(TetrisLogic):
     """ 按帧更新的俄罗斯方块逻辑 """
     NFRAME = 10
     NFRAME_SPEEDUP = 1
+    SNAPSHOT_FIELDS = TetrisLogic.SNAPSHOT_FIELDS + ('is_speedup',
+                                                     'frame_counter')
 
     def __init__(self, root, *a, **kw):
         super().__init__(*a, **kw)
 
-        self.root = root  # 绑定
+        self.root = root  # 绑定窗口，为None时不绘制
         self.is_speedup = False  # 是否处于加速模式
         self.frame_counter = 0  # 帧更新计数器
 
@@ -308,6 +1009,13 @@ class TetrisLogicFrame(TetrisLogic):
         """ 松开加速键 """
         self.is_speedup = False
 
+    def control_drop(self, x, phase):
+        """ 直接落底后新方块重新计帧 """
+        if super().control_drop(x, phase):
+            self.frame_counter = self.NFRAME
+            return True
+        return False
+
     def event_update_frame(self):
         """ 按帧更新游戏逻辑 """
         self.frame_counter -= 1
@@ -319,11 +1027,13 @@ class TetrisLogicFrame(TetrisLogic):
 
     def event_draw(self):
         """ 绑定游戏窗口的绘制事件 """
-        self.root.draw()
+        if self.root:
+            self.root.draw()
 
 
 class TetrisLogicVersus(TetrisLogicFrame):
     """ 按帧更新的俄罗斯方块逻辑 对战版 """
+    SNAPSHOT_FIELDS = TetrisLogicFrame.SNAPSHOT_FIELDS + ('score_counter', )
 
     def __init__(self, root, score_per_line=10, *a, **kw):
         super().__init__(root, *a, **kw)
@@ -339,12 +1049,17 @@ class TetrisLogicVersus(TetrisLogicFrame):
         """
         super().event_clear(n)
         if self.opponent:
-            for i in range(n - 1):
-                self.opponent.event_add_line()
-            while self.score_counter + self.dscore <= self.score:
-                self.score_counter += self.dscore
+            for i in range(self.count_garbage(n)):
                 self.opponent.event_add_line()
 
+    def count_garbage(self, n):
+        """ 本次消除应向对方添加的行数: 多重消除奖励与得分计数 """
+        res = max(n - 1, 0)
+        while self.score_counter + self.dscore <= self.score:
+            self.score_counter += self.dscore
+            res += 1
+        return res
+
 
 ### AI接口
 
@@ -367,6 +1082,29 @@ class TetrisAI:
     def event_clear(self, n):
         """ 消除行时通知事件 """
 
+    def event_preview(self, blocks):
+        """
+        每次调用evaluate前通知预览方块
+        blocks: next_block中各方块的副本
+        """
+
+
+class TetrisAIDrop(TetrisAI):
+    """俄罗斯方块AI接口 落点版
+    evaluate返回目标落点(x, phase)，由游戏逻辑校验可达后直接落底
+    返回(x, phase, swap)且swap为真时先交换预览方块顺序
+    返回None时本回合不操作
+    """
+
+    def evaluate(self, block, pool):
+        """
+        AI执行接口
+        block: 当前方块的副本
+        pool: 当前游戏场地的副本
+        Returns:
+            (目标x坐标, 目标旋转相位[, 是否交换预览]) 或 None
+        """
+
 
 class TetrisLogicAuto(TetrisLogicVersus):
     """按帧更新的俄罗斯方块逻辑 自动控制版
@@ -374,6 +1112,8 @@ class TetrisLogicAuto(TetrisLogicVersus):
     """
 
     NFRAME_AI = 5
+    NFRAME_AI_DROP = 1  # 落点版AI的决策间隔
+    SNAPSHOT_FIELDS = TetrisLogicVersus.SNAPSHOT_FIELDS + ('ai_frame_counter', )
 
     def __init__(self, AI_class, *a, **kw):
         super().__init__(*a, **kw)
@@ -396,17 +1136,45 @@ class TetrisLogicAuto(TetrisLogicVersus):
         self.ai_frame_counter -= 1
         if self.ai_frame_counter <= 0:
             self.ai_frame_counter = self.NFRAME_AI
+            if isinstance(self.AI, TetrisAIDrop):
+                self.ai_frame_counter = self.NFRAME_AI_DROP
+                return self.event_update_drop()
             try:
+                self.AI.event_preview([x.copy() for x in self.next_block])
                 event = self.AI.evaluate(self.curr_block
                                          and self.curr_block.copy(),
-                                         [x[:] for x in self.pool])
-                for e in set(event):
-                    e = self.OPERATIONS.get(e)
-                    if e:
-                        e()
+                                         self.pool.copy())
+                self.apply_keys(event)
             except Exception as e:
                 print(f'AI ERROR|{type(e).__name__}: {e}')
 
+    def event_update_drop(self):
+        """ 调用落点版AI并直接落下当前方块 """
+        if not self.curr_block or self.paused:
+            return
+        try:
+            self.AI.event_preview([x.copy() for x in self.next_block])
+            target = self.AI.evaluate(self.curr_block.copy(),
+                                      self.pool.copy())
+            self.apply_drop(target)
+        except Exception as e:
+            print(f'AI ERROR|{type(e).__name__}: {e}')
+
+    def apply_keys(self, event):
+        """ 执行按键版AI返回的操作序列 """
+        for e in dict.fromkeys(event):  # 去重并保持顺序，结果不受哈希随机化影响
+            e = self.OPERATIONS.get(e)
+            if e:
+                e()
+
+    def apply_drop(self, target):
+        """ 执行落点版AI返回的落点，None时不操作 """
+        if target is not None:
+            x, phase, *swap = target
+            if swap and swap[0]:
+                self.control_swap()
+            self.control_drop(x, phase)
+
     def event_clear(self, n):
         """ 通知AI行消除 """
         super().event_clear(n)
@@ -0,0 +1,250 @@
+import time, random
+from tetris_base import TetrisLogicVersus, TetrisLogicAuto
+
+__doc__ = """多人混战
+    房间内任意人数同场，消行产生的攻击行（多重消除奖励与score_per_line计数，同对战版）
+    由可替换的目标策略分配给其他玩家，先记入目标的待加行队列，于其生成下一方块时一次加入
+    目标策略所需的排名每帧计算一次（目标于本帧死亡时重算），单帧开销与人数成线性
+"""
+
+
+def target_random(room, attacker):
+    """ 随机选择存活的其他玩家 """
+    alive = room.ranking()[0]
+    if len(alive) < 2:
+        return None
+    target = alive[room.rng.randrange(len(alive) - 1)]
+    return alive[-1] if target is attacker else target  # 跳过自身
+
+
+def target_attacker(room, attacker):
+    """ 反击最近攻击自己的玩家，无则随机 """
+    target = attacker.attacker
+    if target is not None and target.running:
+        return target
+    return target_random(room, attacker)
+
+
+def target_highest_score(room, attacker):
+    """ 攻击得分最高的其他玩家 """
+    return _pick(room.ranking()[1], attacker)
+
+
+def target_lowest_height(room, attacker):
+    """ 攻击场地最低（最有余地）的其他玩家 """
+    return _pick(room.ranking()[2], attacker)
+
+
+def _pick(candidates, attacker):
+    """ 由前两名候选中选择非攻击者的一方 """
+    for logic in candidates:
+        if logic is not attacker:
+            return logic
+    return None
+
+
+TARGETING = {
+    'random': target_random,
+    'attacker': target_attacker,
+    'highest_score': target_highest_score,
+    'lowest_height': target_lowest_height,
+}
+
+
+class BattleMixin:
+    """
+    混战玩家
+    由BattleRoom.add加入房间，消行时经房间分配攻击行，生成方块时加入待加行
+    garbage: 待加行数；attacker: 最近攻击自己的玩家
+    snapshot保存garbage，attacker为外部关联不保存
+    """
+
+    def event_clear(self, n):
+        super().event_clear(n)
+        if self.room:
+            lines = self.count_garbage(n)
+            if lines:
+                self.room.send_garbage(self, lines)
+
+    def event_spawn(self):
+        """ 生成方块前一次加入全部待加行 """
+        super().event_spawn()
+        lines, self.garbage = self.garbage, 0
+        for i in range(lines):
+            self.event_add_line()
+
+
+class TetrisLogicBattle(BattleMixin, TetrisLogicVersus):
+    """ 按帧更新的俄罗斯方块逻辑 混战版 """
+    SNAPSHOT_FIELDS = TetrisLogicVersus.SNAPSHOT_FIELDS + ('garbage', )
+    room = None
+    garbage = 0
+    attacker = None
+
+
+class TetrisLogicBattleAuto(BattleMixin, TetrisLogicAuto):
+    """ 按帧更新的俄罗斯方块逻辑 混战AI版 """
+    SNAPSHOT_FIELDS = TetrisLogicAuto.SNAPSHOT_FIELDS + ('garbage', )
+    room = None
+    garbage = 0
+    attacker = None
+
+
+class BattleRoom:
+    """
+    混战房间
+    targeting: 目标策略名（见TARGETING）或函数(room, attacker) -> 目标玩家或None
+    """
+
+    def __init__(self, targeting='random', seed=None):
+        if isinstance(targeting, str):
+            targeting = TARGETING[targeting]
+        self.targeting = targeting
+        self.rng = random.Random(seed)
+        self.players = []
+        self.frame = 0
+        self.garbage_sent = 0  # 已分配的攻击行总数
+        self.ranked_frame = -1
+        self.ranked = None
+
+    def add(self, logic):
+        """ 加入玩家 """
+        logic.room = self
+        logic.garbage, logic.attacker = 0, None
+        self.players.append(logic)
+        return logic
+
+    def reset(self):
+        """ 全部玩家开局 """
+        self.frame = self.garbage_sent = 0
+        self.ranked_frame = -1
+        for logic in self.players:
+            logic.reset()
+            logic.garbage, logic.attacker = 0, None
+
+    @property
+    def running(self):
+        """ 存活玩家多于一名 """
+        return sum(1 for logic in self.players if logic.running) > 1
+
+    def ranking(self):
+        """
+        本帧的存活玩家与排名，每帧计算一次并缓存
+        Returns:
+            (存活玩家列表, 得分最高的两名, 场地最低的两名)
+        """
+        if self.ranked_frame == self.frame:
+            return self.ranked
+        alive = [logic for logic in self.players if logic.running]
+        top = sorted(alive[:2], key=self.score_key)
+        low = sorted(alive[:2], key=self.height_key)
+        for logic in alive[2:]:  # 单次遍历维护前两名
+            if self.score_key(logic) < self.score_key(top[1]):
+                top[1] = logic
+                if self.score_key(logic) < self.score_key(top[0]):
+                    top.reverse()
+            if self.height_key(logic) < self.height_key(low[1]):
+                low[1] = logic
+                if self.height_key(logic) < self.height_key(low[0]):
+                    low.reverse()
+        self.ranked_frame, self.ranked = self.frame, (alive, top, low)
+        return self.ranked
+
+    @staticmethod
+    def score_key(logic):
+        return -logic.score
+
+    @staticmethod
+    def height_key(logic):
+        return max(logic.pool.heights) + logic.garbage
+
+    def send_garbage(self, attacker, lines):
+        """
+        将攻击行记入目标玩家的待加行队列
+        目标已于本帧死亡时作废排名缓存，在存活玩家中重选；无其他存活玩家时丢弃
+        """
+        target = self.targeting(self, attacker)
+        if target is not None and not target.running:  # 排名内的玩家可能已于本帧死亡
+            self.ranked_frame = -1
+            target = self.targeting(self, attacker)
+        if target is None or not target.running:
+            return
+        target.garbage += lines
+        target.attacker = attacker
+        self.garbage_sent += lines
+
+    def update(self):
+        """ 全部存活玩家各更新一帧 """
+        self.frame += 1
+        for logic in self.players:
+            if logic.running:
+                logic.event_update_frame()
+
+    def standings(self):
+        """ 按存活、得分排序的玩家列表 """
+        return sorted(
+            self.players, key=lambda logic: (not logic.running, -logic.score))
+
+
+def run_battle(AI_classes, seed=None, targeting='random', max_frames=None,
+               **kw):
+    """
+    无界面运行一场AI混战直至仅剩一名玩家
+    AI_classes: 各玩家的AI类
+    kw: 传递给TetrisLogicBattleAuto的参数，如size、score_per_line
+    Returns:
+        (房间, 每帧平均耗时)
+    """
+    room = BattleRoom(targeting, seed)
+    for i, AI_class in enumerate(AI_classes):
+        seed_i = None if seed is None else seed + i
+        room.add(TetrisLogicBattleAuto(AI_class, None, seed=seed_i, **kw))
+
+    start = time.perf_counter()
+    while room.running:
+        if max_frames is not None and room.frame >= max_frames:
+            break
+        room.update()
+    elapsed = time.perf_counter() - start
+    return room, elapsed / max(room.frame, 1)
+
+
+def main():
+    import argparse
+    from tetris_headless import load_AI
+
+    parser = argparse.ArgumentParser(description='多人混战')
+    parser.add_argument('ai', nargs='+', help='AI类名或module.Class，按人数循环使用')
+    parser.add_argument('-n', '--players', type=int, default=8, help='人数')
+    parser.add_argument(
+        '--targeting',
+        default='random',
+        choices=sorted(TARGETING),
+        help='攻击目标策略')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--frames', type=int, help='帧数上限')
+    parser.add_argument(
+        '--score-per-line', type=int, default=10, help='每多少分向对手加一行')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    args = parser.parse_args()
+
+    AI_classes = [load_AI(name) for name in args.ai]
+    room, per_frame = run_battle(
+        [AI_classes[i % len(AI_classes)] for i in range(args.players)],
+        args.seed,
+        args.targeting,
+        args.frames,
+        score_per_line=args.score_per_line,
+        size=tuple(args.size))
+
+    for rank, logic in enumerate(room.standings(), 1):
+        print(f'{rank:3d}. {type(logic.AI).__name__:12s}'
+              f' score:{logic.score} lines:{logic.lines}'
+              f' pieces:{logic.block_count}'
+              f'{"" if logic.running else " Game Over"}')
+    print(f'{room.frame} frames, {room.garbage_sent} garbage lines,'
+          f' {per_frame * 1000:.3f} ms/frame')
+
+
+if __name__ == '__main__':
+    main()
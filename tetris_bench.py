@@ -0,0 +1,268 @@
+import sys, time, json, random, timeit, platform
+from tetris_base import Block, Pool, BitPool, BytePool, TetrisLogic
+from tetris_ai_examples import PierreDellacherie, PDFeatures, PDFast, PDDrop
+from tetris_headless import run_games
+try:
+    from tetris_ai_numpy import PDNumpy
+except ImportError:  # numpy为可选依赖
+    PDNumpy = None
+
+__doc__ = """性能基准
+    以固定种子与固定场地（空场、中局、濒死）测量引擎与AI热点路径，以及无界面整局吞吐量
+    结果保存为JSON，--compare与旧结果逐项对比，便于发现版本间的性能退化
+"""
+
+FIXTURES = {  # 场地名 -> 底部杂行数（相对场地高度的偏移，负数为height+该值）
+    'empty': 0,
+    'mid': 8,
+    'near_death': -4,
+}
+POOL_TYPES = {'list': Pool, 'bit': BitPool, 'byte': BytePool}
+
+
+def fixture_rows(name, width, height, seed=0):
+    """
+    生成固定的场地行，自底向上
+    每行至少留一个空格，顶部数行逐渐稀疏形成起伏表面
+    """
+    nrow = FIXTURES[name]
+    if nrow < 0:
+        nrow += height
+    rng = random.Random(f'{name}:{seed}')
+    rows = []
+    for y in range(nrow):
+        density = 0.8 if y < nrow - 3 else 0.5
+        line = [int(rng.random() < density) for x in range(width)]
+        line[rng.randrange(width)] = 0
+        rows.append(line)
+    return rows
+
+
+def build_pool(pool_type, width, height, rows):
+    """ 以底部加行方式由自底向上的行列表构建场地，各列高度随之维护 """
+    pool = pool_type(width, height)
+    for line in reversed(rows):
+        pool.add_line(line)
+    return pool
+
+
+def make_logic(name, pool_type=Pool, size=(10, 20), seed=0):
+    """ 创建场地为指定固定场地、已生成当前方块的游戏逻辑 """
+    logic = TetrisLogic(size, seed, pool_type=pool_type)
+    logic.pool = build_pool(pool_type, logic.width, logic.height,
+                            fixture_rows(name, *size, seed))
+    logic.invalidate_lines()
+    logic.event_update()  # 生成方块
+    return logic
+
+
+def landed_block(logic):
+    """ 当前方块竖直落底后的副本 """
+    block = logic.curr_block.copy()
+    block.y = logic.pool.drop_y(block, block.x, block.y)
+    return block
+
+
+def bench(func, setup=None, min_time=0.2):
+    """
+    测量单次调用耗时
+    setup: 每次调用前执行且不计时，给出时逐次计时
+    Returns:
+        {'seconds': 单次耗时, 'ops_per_sec': 每秒次数, 'number': 调用次数}
+    """
+    if setup is None:
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        number = max(int(number * min_time / 0.2), 1)
+        best = min(timer.repeat(3, number)) / number
+    else:
+        # 逐次计时取平均，单次最小值受计时精度影响过大
+        clock = time.perf_counter
+        number = total = 0
+        deadline = clock() + min_time
+        while number < 10 or clock() < deadline:
+            setup()
+            start = clock()
+            func()
+            total += clock() - start
+            number += 1
+        best = total / number
+    return {'seconds': best, 'ops_per_sec': 1 / best, 'number': number}
+
+
+def engine_cases(pool_name, size=(10, 20)):
+    """ 引擎热点: 平移、旋转、消行、加行、绘制、快照 """
+    pool_type = POOL_TYPES[pool_name]
+    for name in FIXTURES:
+        logic = make_logic(name, pool_type, size)
+        block = logic.curr_block
+        pos = block.x, block.y
+        yield f'try_move[{pool_name},{name}]', logic.try_move, (pos, )
+
+        def rotate(logic=logic):
+            logic.try_rotate()
+
+        yield f'try_rotate[{pool_name},{name}]', rotate, ()
+
+        # 逐行文本绘制：全部重绘与命中缓存
+        def dump_full(logic=logic):
+            logic.invalidate_lines()
+            logic.dump_lines()
+
+        yield f'dump_lines[{pool_name},{name}]', dump_full, ()
+        yield f'dump_lines_cached[{pool_name},{name}]', logic.dump_lines, ()
+
+        # 局面快照与恢复
+        snap = logic.snapshot()
+        yield f'snapshot[{pool_name},{name}]', logic.snapshot, ()
+        yield f'restore[{pool_name},{name}]', logic.restore, (snap, )
+
+        # 底部加行，每次恢复场地
+        rows = fixture_rows(name, *size)
+
+        def restore(logic=logic, rows=rows):
+            logic.pool = build_pool(pool_type, logic.width, logic.height,
+                                    rows)
+
+        yield f'event_add_line[{pool_name},{name}]', (logic.event_add_line,
+                                                      restore), ()
+
+        # 竖直I块落入左侧空列，一次消除4行
+        w, h = size
+        clear_rows = [[0] + [1] * (w - 1)] * 4 + rows[:h - 8]
+        I = Block(Block.BLOCK_NAMES.index('I'))
+        while len({dx for dx, dy in I}) > 1:
+            I.rotate()
+        I.x, I.y = -min(dx for dx, dy in I), -min(dy for dx, dy in I)
+
+        def setup_clear(logic=logic, clear_rows=clear_rows, I=I):
+            logic.pool = build_pool(pool_type, w, h, clear_rows)
+            logic.curr_block = I.copy()
+            logic.block_settled = True
+
+        yield f'event_update_clear4[{pool_name},{name}]', (logic.event_update,
+                                                           setup_clear), ()
+
+
+def block_cases():
+    """ 方块复制与旋转 """
+    block = Block(Block.BLOCK_NAMES.index('T'))
+    block.x, block.y = 5, 10
+    yield 'Block.copy', block.copy, ()
+    yield 'Block.rotate', block.rotate, ()
+
+
+def ai_cases(size=(10, 20)):
+    """ PD估值: 整盘扫描参照实现、增量实现与完整落点搜索 """
+    AI = PierreDellacherie(*size)
+    for name in FIXTURES:
+        logic = make_logic(name, Pool, size)
+        pool = logic.pool.copy()
+        block = landed_block(logic)
+        features = PDFeatures(pool, *size)
+        yield f'PierreDellacherie.calc_pd[{name}]', AI.calc_pd, (block, pool)
+        yield f'PDFeatures.calc_pd[{name}]', features.calc_pd, (block, )
+        yield f'PDFeatures.build[{name}]', PDFeatures, (pool, *size)
+        yield f'get_best_drop[{name}]', AI.get_best_drop, (logic.curr_block,
+                                                          pool)
+        if PDNumpy:
+            yield f'PDNumpy.get_best_drop[{name}]', PDNumpy(
+                *size).get_best_drop, (logic.curr_block, pool)
+
+
+def run_benchmarks(pools=('list', ), games=3, pieces=300, min_time=0.2,
+                   pattern=''):
+    """
+    运行全部基准
+    pattern: 仅运行名称包含该子串的项
+    Returns:
+        {名称: bench结果}
+    """
+    cases = []
+    for pool_name in pools:
+        cases.extend(engine_cases(pool_name))
+    cases.extend(block_cases())
+    cases.extend(ai_cases())
+
+    results = {}
+    for name, func, args in cases:
+        if pattern not in name:
+            continue
+        setup = None
+        if isinstance(func, tuple):
+            func, setup = func
+        if args:
+            func = (lambda func, args: lambda: func(*args))(func, args)
+        results[name] = bench(func, setup, min_time)
+        print(f'{name:48s} {results[name]["seconds"] * 1e6:10.2f} us')
+
+    # 无界面整局吞吐量
+    for AI_class in PDFast, PDDrop:
+        name = f'headless[{AI_class.__name__}]'
+        if pattern not in name:
+            continue
+        _, stats = run_games(AI_class, range(games), max_pieces=pieces)
+        results[name] = {
+            'seconds': stats['seconds'] / stats['games'],
+            'ops_per_sec': stats['games_per_sec'],
+            'pieces_per_sec': stats['pieces_per_sec'],
+            'number': stats['games'],
+        }
+        print(f'{name:48s} {stats["games_per_sec"]:10.2f} games/s'
+              f' {stats["pieces_per_sec"]:.0f} pieces/s')
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """ 与旧结果逐项对比单次耗时，打印变化超过阈值的项 """
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        ratio = res['seconds'] / old['seconds']
+        mark = ''
+        if ratio > 1 + threshold:
+            mark = ' SLOWER'
+        elif ratio < 1 - threshold:
+            mark = ' faster'
+        print(f'{name:48s} {ratio:6.2f}x{mark}')
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='引擎与AI性能基准')
+    parser.add_argument('-o', '--out', help='结果JSON保存路径')
+    parser.add_argument('--compare', help='对比的旧结果JSON')
+    parser.add_argument(
+        '--pools',
+        nargs='+',
+        default=['list'],
+        choices=sorted(POOL_TYPES),
+        help='测量的场地存储方式')
+    parser.add_argument('-k', '--filter', default='', help='仅运行名称包含该子串的项')
+    parser.add_argument(
+        '--min-time', type=float, default=0.2, help='每项最短测量时间（秒）')
+    parser.add_argument('--games', type=int, default=3, help='整局吞吐量的局数')
+    parser.add_argument('--pieces', type=int, default=300, help='整局吞吐量的单局方块数')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.pools, args.games, args.pieces,
+                             args.min_time, args.filter)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': sys.version.split()[0],
+                    'platform': platform.platform(),
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                },
+                'results': results,
+            }, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)['results'])
+
+
+if __name__ == '__main__':
+    main()
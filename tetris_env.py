@@ -0,0 +1,84 @@
+import collections
+from tetris_base import BytePool, TetrisLogic
+
+__doc__ = """reset/step式环境封装
+    基于字节场地BytePool，观测中的场地为实时缓冲区的只读视图，不复制
+    视图为(height+1, width)的memoryview，以board[y, x]访问；numpy=True时为只读numpy数组
+    当前方块与预览方块以小型元组给出；智能体需修改场地时应自行复制
+"""
+
+# 动作编号
+NOOP, LEFT, RIGHT, ROTATE, SWAP, DROP = range(6)
+
+# 方块信息: 当前方块类型(无方块时为None)、x、y、相位、预览方块类型
+PieceInfo = collections.namedtuple('PieceInfo', 'type x y phase next')
+
+# 观测: 场地只读视图、方块信息
+Observation = collections.namedtuple('Observation', 'board piece')
+
+
+class TetrisEnv:
+    """
+    单局俄罗斯方块环境
+    step接受动作编号，或落点(x, phase[, swap])直接落下当前方块
+    """
+
+    def __init__(self, size=(10, 20), seed=None, generator='uniform',
+                 numpy=False):
+        self.logic = TetrisLogic(
+            size, seed, generator=generator, pool_type=BytePool)
+        self.numpy = numpy  # 场地视图是否为numpy数组
+        self.board = None
+        self.controls = {
+            LEFT: self.logic.control_left,
+            RIGHT: self.logic.control_right,
+            ROTATE: self.logic.control_rotate,
+            SWAP: self.logic.control_swap,
+        }
+
+    def reset(self):
+        """ 开局并返回初始观测 """
+        self.logic.reset()
+        self.logic.event_update()  # 生成首个方块
+
+        # 新场地缓冲区创建后仅需生成一次视图
+        self.board = self.logic.pool.view()
+        if self.numpy:
+            import numpy as np
+            self.board = np.frombuffer(self.board, dtype=np.uint8).reshape(
+                self.board.shape)
+        return self.observe()
+
+    def observe(self):
+        logic = self.logic
+        block = logic.curr_block
+        piece = PieceInfo(block and block.type, block and block.x, block
+                          and block.y, block and block.phase,
+                          tuple(x.type for x in logic.next_block))
+        return Observation(self.board, piece)
+
+    def step(self, action):
+        """
+        执行动作并推进一次游戏逻辑
+        Returns:
+            (观测, 得分增量, 是否结束, 附加信息)
+        """
+        logic = self.logic
+        score, lines = logic.score, logic.lines
+
+        if isinstance(action, tuple):  # 落点
+            x, phase, *swap = action
+            if swap and swap[0]:
+                logic.control_swap()
+            logic.control_drop(x, phase)
+        elif action == DROP:
+            if logic.curr_block:
+                logic.control_drop(logic.curr_block.x, logic.curr_block.phase)
+        elif action in self.controls:
+            self.controls[action]()
+
+        logic.event_update()
+        return self.observe(), logic.score - score, not logic.running, {
+            'lines': logic.lines - lines,
+            'pieces': logic.block_count,
+        }
@@ -0,0 +1,160 @@
+import time
+from tetris_base import TetrisLogicAuto
+
+__doc__ = """无界面高速模拟
+    不依赖tkinter，关闭绘制后以CPU全速驱动游戏逻辑
+    统计每秒局数与每秒方块数，用于大量评估AI
+"""
+
+
+def run_logic(logic, max_pieces=None, max_frames=None):
+    """
+    全速驱动单个游戏逻辑直至死亡或达到上限
+    logic: TetrisLogic及其子类实例，帧更新版按帧驱动
+    Returns:
+        实际运行的帧数
+    """
+    step = getattr(logic, 'event_update_frame', logic.event_update)
+    frames = 0
+    while logic.running:
+        if max_frames is not None and frames >= max_frames:
+            break
+        if max_pieces is not None and logic.block_count > max_pieces:
+            break
+        step()
+        frames += 1
+    return frames
+
+
+def run_game(AI_class,
+             seed=None,
+             max_pieces=None,
+             max_frames=None,
+             ai_options=None,
+             profiler=None,
+             **kw):
+    """
+    无界面运行一局AI单人游戏
+    ai_options: 传递给AI实例configure方法的参数，如time_budget、max_depth
+    profiler: tetris_profile.LogicProfiler实例，给出时于本局挂载以累计统计
+    kw: 传递给TetrisLogicAuto的参数，如size、bitboard、generator
+    Returns:
+        单局结果字典，AI提供stats方法时附带其统计
+    """
+    logic = TetrisLogicAuto(AI_class, None, seed=seed, **kw)
+    if ai_options:
+        logic.AI.configure(**ai_options)
+    if profiler:
+        profiler.attach(logic)
+    frames = run_logic(logic, max_pieces, max_frames)
+    if profiler:  # 统计已累计，解除以释放本局对象
+        profiler.detach(logic)
+    res = {
+        'seed': seed,
+        'score': logic.score,
+        'lines': logic.lines,
+        'pieces': logic.block_count - bool(logic.curr_block),  # 已落定方块数
+        'frames': frames,
+        'alive': bool(logic.running),
+    }
+    if hasattr(logic.AI, 'stats'):
+        res['ai'] = logic.AI.stats()
+    return res
+
+
+def run_games(AI_class, seeds, max_pieces=None, max_frames=None, **kw):
+    """
+    按种子列表依次运行多局游戏并统计吞吐量
+    Returns:
+        (各局结果列表, 统计字典)
+    """
+    results = []
+    start = time.perf_counter()
+    for seed in seeds:
+        results.append(run_game(AI_class, seed, max_pieces, max_frames, **kw))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    pieces = sum(r['pieces'] for r in results)
+    frames = sum(r['frames'] for r in results)
+    return results, {
+        'games': len(results),
+        'pieces': pieces,
+        'frames': frames,
+        'seconds': elapsed,
+        'games_per_sec': len(results) / elapsed,
+        'pieces_per_sec': pieces / elapsed,
+        'frames_per_sec': frames / elapsed,
+    }
+
+
+def load_AI(name):
+    """
+    按名称加载AI类
+    name: 类名（自tetris_ai_examples查找）或module.Class形式
+    """
+    import importlib
+    module, _, name = name.rpartition('.')
+    return getattr(importlib.import_module(module or 'tetris_ai_examples'),
+                   name)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='无界面AI高速模拟')
+    parser.add_argument(
+        'ai', nargs='?', default='PDFast', help='AI类名或module.Class')
+    parser.add_argument('-n', '--games', type=int, default=10, help='局数')
+    parser.add_argument('--seed', type=int, default=0, help='起始种子')
+    parser.add_argument('--pieces', type=int, help='单局方块上限')
+    parser.add_argument('--frames', type=int, help='单局帧数上限')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    parser.add_argument('--bitboard', action='store_true', help='使用位场地')
+    parser.add_argument(
+        '--generator',
+        default='uniform',
+        help='方块生成器: uniform/7bag/14bag/history/file:路径')
+    parser.add_argument('--budget', type=float, help='限时AI每个方块的搜索时限（秒）')
+    parser.add_argument('--depth', type=int, help='限时AI的最大搜索深度')
+    parser.add_argument(
+        '--profile', action='store_true', help='输出热点方法计数与耗时统计(JSON)')
+    args = parser.parse_args()
+
+    ai_options = {}
+    if args.budget is not None:
+        ai_options['time_budget'] = args.budget
+    if args.depth is not None:
+        ai_options['max_depth'] = args.depth
+    profiler = None
+    if args.profile:
+        from tetris_profile import LogicProfiler
+        profiler = LogicProfiler()
+
+    AI_class = load_AI(args.ai)
+    results, stats = run_games(
+        AI_class,
+        range(args.seed, args.seed + args.games),
+        args.pieces,
+        args.frames,
+        size=tuple(args.size),
+        bitboard=args.bitboard,
+        ai_options=ai_options,
+        profiler=profiler,
+        generator=args.generator)
+
+    for r in results:
+        print(f'seed:{r["seed"]} score:{r["score"]} pieces:{r["pieces"]}'
+              f' frames:{r["frames"]}{"" if r["alive"] else " Game Over"}')
+        if 'ai' in r:
+            print('   ', ' '.join(f'{k}:{v:.4g}' for k, v in r['ai'].items()))
+    print(f'{stats["games"]} games, {stats["pieces"]} pieces'
+          f' in {stats["seconds"]:.2f}s |'
+          f' {stats["games_per_sec"]:.2f} games/s'
+          f' {stats["pieces_per_sec"]:.1f} pieces/s'
+          f' {stats["frames_per_sec"]:.0f} frames/s')
+    if profiler:
+        print(profiler.dump_json(indent=1))
+
+
+if __name__ == '__main__':
+    main()
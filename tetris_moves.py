@@ -0,0 +1,202 @@
+import time, collections
+from tetris_base import BitPool, TetrisLogic
+from tetris_search import TranspositionTable
+
+__doc__ = """可达落点生成
+    以(x, y, phase)为状态广度优先搜索，平移与旋转（含踢墙偏移）直接沿用TetrisLogic.try_move/try_rotate，
+    与引擎规则完全一致，可找到竖直落底无法到达的滑入（tuck）与旋入（spin）落点，也不会给出引擎中不可达的落点
+    结果为各落点及其最短按键序列，按场地与方块初始位姿缓存
+"""
+
+# 按键: 左移、右移、正旋转、下移一行、落至底部（连续下移）
+MOVES = {'a': (-1, 0), 'd': (1, 0), 's': (0, -1)}
+KEY_ROTATE = 'w'
+KEY_FALL = 'x'
+KEYS = 'adwsx'
+
+
+class MoveProbe:
+    """
+    试探用的最小游戏逻辑
+    借用TetrisLogic的平移与旋转方法，在任意场地上移动curr_block
+    """
+    try_move = TetrisLogic.try_move
+    try_rotate = TetrisLogic.try_rotate
+
+    def __init__(self, pool, height):
+        self.pool = pool
+        self.height = height
+        self.curr_block = None
+
+
+def press(logic, key):
+    """
+    按logic的规则对其当前方块执行一次按键
+    logic: TetrisLogic或MoveProbe
+    Returns:
+        方块是否移动
+    """
+    block = logic.curr_block
+    if key == KEY_ROTATE:
+        return logic.try_rotate()
+    if key == KEY_FALL:
+        y = logic.pool.drop_y(block, block.x, block.y)
+        moved, block.y = y != block.y, y
+        return moved
+    dx, dy = MOVES[key]
+    return logic.try_move((block.x + dx, block.y + dy))
+
+
+def control_path(logic, path):
+    """
+    按path移动当前方块后就地放置，同control_drop
+    不经control_*操作，ReplayRecorder不记录其中的按键
+    Returns:
+        是否成功，失败时方块位置复原
+    """
+    block = logic.curr_block
+    if not block or logic.paused:
+        return False
+    origin = block.x, block.y, block.phase
+    for key in path:
+        if not press(logic, key):
+            block.x, block.y, block.phase = origin
+            return False
+    logic.block_settled = True
+    if hasattr(logic, 'frame_counter'):  # 帧更新版新方块重新计帧
+        logic.frame_counter = logic.NFRAME
+    logic.event_update()
+    return True
+
+
+class MoveGenerator:
+    """
+    可达落点生成器
+    落点为下移一行即碰撞的状态，自方块当前位姿出发的最短按键序列由广度优先搜索给出
+    同一场地与方块位姿的结果缓存于LRU表，命中时直接返回
+    """
+    TABLE_SIZE = 10000
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.table = TranspositionTable(self.TABLE_SIZE)
+        self.states = 0  # 已展开的状态数
+
+    def board(self, pool):
+        """
+        返回(场地键, 位场地)
+        pool: 任意场地类或AI接口收到的逐行列表
+        """
+        if isinstance(pool, BitPool):
+            return tuple(pool.rows), pool
+        rows = tuple(
+            sum(1 << x for x, cell in enumerate(line) if cell)
+            for line in pool)
+        bitpool = BitPool(self.width, self.height)
+        bitpool.rows[:] = rows
+        bitpool.update_heights()
+        return rows, bitpool
+
+    def placements(self, block, pool):
+        """
+        搜索方块自当前位姿可达的全部落点
+        Returns:
+            ((按键序列, (x, y, phase)), ...)，按序列长度升序，结果为缓存对象
+        """
+        rows, pool = self.board(pool)
+        start = block.x, block.y, block.phase
+        key = rows, block.type, start
+        res = self.table.get(key)
+        if res is None:
+            res = self.search(block.copy(), pool)
+            self.table.put(key, res)
+        return res
+
+    def search(self, block, pool):
+        """ 广度优先搜索，block将被修改 """
+        probe = MoveProbe(pool, self.height)
+        probe.curr_block = block
+        start = block.x, block.y, block.phase
+        paths = {start: ''}
+        queue = collections.deque([start])
+        res = []
+        while queue:
+            state = queue.popleft()
+            path = paths[state]
+            self.states += 1
+            for key in KEYS:
+                block.x, block.y, block.phase = state
+                if not press(probe, key):
+                    if key == KEY_FALL:  # 无法下移即为落点
+                        res.append((path, state))
+                    continue
+                child = block.x, block.y, block.phase
+                if child not in paths:
+                    paths[child] = path + key
+                    queue.append(child)
+        return tuple(res)
+
+    def drops(self, block, pool):
+        """
+        遍历可达落点，落点方块的用法同PDFeatures.drops
+        注意首项为按键序列字符串而非旋转次数，不能直接用于-dphase平分比较
+        Yields:
+            (按键序列, 落点方块)，落点方块为同一对象，需保留时应复制
+        """
+        mblock = block.copy()
+        for path, (mblock.x, mblock.y, mblock.phase) in self.placements(
+                block, pool):
+            yield path, mblock
+
+    def stats(self):
+        """ 返回搜索与缓存统计字典 """
+        return {
+            'states': self.states,
+            'cached': len(self.table),
+            'hits': self.table.hits,
+            'misses': self.table.misses,
+        }
+
+
+def main():
+    import argparse
+    from tetris_base import TetrisLogicAuto
+    from tetris_ai_examples import PDDrop, PDFeatures
+
+    parser = argparse.ArgumentParser(description='可达落点与竖直落点对比')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--pieces', type=int, default=200, help='对比的方块数')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    args = parser.parse_args()
+
+    # 以PDDrop对局，每个新方块对比两种落点集合
+    logic = TetrisLogicAuto(
+        PDDrop, None, seed=args.seed, size=tuple(args.size), bitboard=True)
+    gen = MoveGenerator(logic.width, logic.height)
+    counts = collections.Counter()
+    elapsed = 0.0
+    last = None
+    while logic.running and logic.block_count <= args.pieces:
+        block = logic.curr_block
+        if block and logic.block_count != last:
+            last = logic.block_count
+            start = time.perf_counter()
+            reach = {state for path, state in gen.placements(block, logic.pool)}
+            elapsed += time.perf_counter() - start
+            features = PDFeatures(logic.pool.copy(), logic.width, logic.height)
+            drops = {(b.x, b.y, b.phase) for dphase, b in features.drops(block)}
+            counts['pieces'] += 1
+            counts['reachable'] += len(reach)
+            counts['drops'] += len(drops)
+            counts['extra'] += len(reach - drops)  # 滑入与旋入
+            counts['unreachable_drops'] += len(drops - reach)
+        logic.event_update_frame()
+
+    n = max(counts['pieces'], 1)
+    for name in 'reachable', 'drops', 'extra', 'unreachable_drops':
+        print(f'{name:18s} {counts[name] / n:8.2f} per piece')
+    print(f'{elapsed / n * 1000:.3f} ms per piece, {gen.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import time, json, collections
+
+__doc__ = """游戏逻辑性能剖析
+    LogicProfiler在玩家实例上包装热点方法，统计调用次数、碰撞、旋转踢墙、消行与各阶段耗时
+    仅在挂载时生效，未挂载的实例不受任何影响；detach后还原，剖析器不再引用该实例
+    各阶段计时包含其内部调用，如event_update包含消行与绘制
+    BitPool/BytePool使用__slots__，无法包装实例方法，其消行不单独计时
+"""
+
+
+class Histogram:
+    """
+    耗时直方图
+    按微秒数的2的幂分桶，桶键为上界（微秒）
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = collections.Counter()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[1 << int(seconds * 1e6).bit_length()] += 1
+
+    def dump(self):
+        """ 返回统计字典，耗时单位为秒 """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / max(self.count, 1),
+            'max': self.max,
+            'buckets_us': {
+                bound: self.buckets[bound]
+                for bound in sorted(self.buckets)
+            },
+        }
+
+
+class LogicProfiler:
+    """
+    游戏逻辑剖析器
+    attach挂载的各实例共用一组统计，可跨多局累计
+    counters: 计数器，moves为平移尝试（含旋转内部的尝试），collisions为其中被阻挡的次数
+        rotations为旋转尝试，rotate_kicks为偏移后才成功的旋转，rotate_fails为失败的旋转
+    timings: 各方法的耗时直方图，AI决策为ai_evaluate
+    """
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self.timings = collections.defaultdict(Histogram)
+        self.wrapped = {}  # 玩家 -> [(对象, 方法名), ...] 便于解除
+
+    def attach(self, *logics):
+        """ 挂载至玩家实例，须在绑定按键之后调用 """
+        for logic in logics:
+            self.wrapped[logic] = []
+            self.wrap(logic, logic, 'try_move', self.wrap_move)
+            self.wrap(logic, logic, 'try_rotate', self.wrap_rotate, logic)
+            self.wrap(logic, logic, 'event_add_line', self.wrap_counted,
+                      'added_lines')
+            self.wrap(logic, logic, 'event_clear', self.wrap_clear)
+            self.wrap(logic, logic, 'reset', self.wrap_reset, logic)
+            for name in 'event_update', 'event_draw':
+                self.wrap(logic, logic, name, self.wrap_timed, name)
+            self.wrap_pool(logic)
+
+            AI = getattr(logic, 'AI', None)  # TetrisLogicAuto
+            if AI:
+                self.wrap(logic, AI, 'evaluate', self.wrap_timed,
+                          'ai_evaluate')
+        return self
+
+    def wrap(self, logic, obj, name, wrapper, *a):
+        """ 包装logic自身或其所属对象的方法 """
+        func = getattr(obj, name)
+        setattr(obj, name, wrapper(func, *a))
+        self.wrapped[logic].append((obj, name))
+
+    def wrap_pool(self, logic):
+        """ 场地随开局重建，需重新包装，不再保留旧场地 """
+        entries = self.wrapped[logic]
+        entries[:] = [(obj, name) for obj, name in entries
+                      if name != 'clear_lines']
+        if hasattr(logic.pool, '__dict__'):
+            self.wrap(logic, logic.pool, 'clear_lines', self.wrap_timed,
+                      'clear_lines')
+
+    def wrap_timed(self, func, name):
+        hist = self.timings[name]
+        clock = time.perf_counter
+
+        def timed(*a):
+            start = clock()
+            try:
+                return func(*a)
+            finally:
+                hist.add(clock() - start)
+
+        timed.__name__ = func.__name__
+        return timed
+
+    def wrap_counted(self, func, name):
+        counters = self.counters
+
+        def counted(*a):
+            counters[name] += 1
+            return func(*a)
+
+        counted.__name__ = func.__name__
+        return counted
+
+    def wrap_move(self, func):
+        func = self.wrap_timed(func, 'try_move')
+        counters = self.counters
+
+        def try_move(*a):
+            res = func(*a)
+            counters['moves'] += 1
+            if not res:
+                counters['collisions'] += 1
+            return res
+
+        return try_move
+
+    def wrap_rotate(self, func, logic):
+        func = self.wrap_timed(func, 'try_rotate')
+        counters = self.counters
+
+        def try_rotate(*a):
+            block = logic.curr_block
+            origin = block and (block.x, block.y)
+            res = func(*a)
+            counters['rotations'] += 1
+            if not res:
+                counters['rotate_fails'] += 1
+            elif (block.x, block.y) != origin:
+                counters['rotate_kicks'] += 1
+            return res
+
+        return try_rotate
+
+    def wrap_clear(self, func):
+        counters = self.counters
+
+        def event_clear(n):
+            counters['placements'] += 1
+            counters['lines'] += n
+            if n:
+                counters[f'clear_{n}'] += 1
+            return func(n)
+
+        return event_clear
+
+    def wrap_reset(self, func, logic):
+        def reset(*a):
+            res = func(*a)
+            self.wrap_pool(logic)
+            return res
+
+        return reset
+
+    def detach(self, *logics):
+        """
+        还原被包装的方法并不再引用这些玩家，统计保留
+        logics: 解除的玩家，未给出时解除全部
+        """
+        for logic in logics or list(self.wrapped):
+            for obj, name in self.wrapped.pop(logic, ()):
+                if name in vars(obj):
+                    delattr(obj, name)
+
+    def clear(self):
+        """ 清空统计 """
+        self.counters.clear()
+        for hist in self.timings.values():  # 包装函数持有直方图，原地清空
+            hist.__init__()
+
+    def snapshot(self):
+        """ 返回统计字典 """
+        return {
+            'counters': dict(self.counters),
+            'timings':
+            {name: hist.dump()
+             for name, hist in sorted(self.timings.items())},
+        }
+
+    def dump_json(self, **kw):
+        """ 返回JSON格式的统计 """
+        return json.dumps(self.snapshot(), **kw)
@@ -0,0 +1,279 @@
+import struct, zlib
+from tetris_base import RandSeq, TetrisLogic, TetrisLogicFrame, TetrisLogicVersus
+
+__doc__ = """录像记录与回放
+    游戏过程完全由RandSeq种子、control_*操作与逐帧更新决定
+    记录器以紧凑二进制格式写入种子与(帧间隔, 操作码)序列，回放器无界面全速重演并校验终局状态
+
+    文件格式（小端）:
+        头部: b'YTRP', 版本, 逻辑类型, 玩家数, 宽, 高, score_per_line
+        方块生成器名: 长度(1字节) + UTF-8字符串
+        各玩家种子: 类型(0整数/1浮点) + 8字节
+        记录: 帧间隔(变长整数) + 操作码字节(高4位玩家序号，低4位操作)，落点操作后接x、phase各1字节
+        终局: END操作码后接各玩家(得分, 消行数, 方块数, 存活, 场地CRC32)
+
+    帧为所有玩家更新调用的全局计数，多人时须按玩家顺序轮流调用更新
+"""
+
+MAGIC = b'YTRP'
+VERSION = 3  # 版本2起RandSeq使用独立随机流，版本3起记录方块生成器
+
+# 逻辑类型
+KIND_LOGIC, KIND_FRAME, KIND_VERSUS = range(3)
+LOGIC_CLASSES = [TetrisLogic, TetrisLogicFrame, TetrisLogicVersus]
+
+# 操作码
+(OP_LEFT, OP_RIGHT, OP_ROTATE, OP_SWAP, OP_SPEEDUP, OP_SPEEDDOWN,
+ OP_DROP) = range(7)
+OP_END = 15
+UNPAUSED = {OP_SPEEDUP, OP_SPEEDDOWN}  # 暂停时仍生效的操作
+OPERATIONS = {
+    OP_LEFT: 'control_left',
+    OP_RIGHT: 'control_right',
+    OP_ROTATE: 'control_rotate',
+    OP_SWAP: 'control_swap',
+    OP_SPEEDUP: 'control_speedup',
+    OP_SPEEDDOWN: 'control_speeddown',
+    OP_DROP: 'control_drop',
+}
+
+HEADER = struct.Struct('<4sBBBHHH')
+SEED_INT = struct.Struct('<Bq')
+SEED_FLOAT = struct.Struct('<Bd')
+STATE = struct.Struct('<iiiBI')
+
+
+def _write_varint(buf, n):
+    while n >= 0x80:
+        buf.append(n & 0x7f | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _read_varint(data, pos):
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _logic_kind(logic):
+    for kind in reversed(range(len(LOGIC_CLASSES))):
+        if isinstance(logic, LOGIC_CLASSES[kind]):
+            return kind
+
+
+def logic_state(logic):
+    """ 终局状态摘要 (得分, 消行数, 方块数, 存活, 场地CRC32) """
+    cells = bytes(cell for line in logic.pool.copy() for cell in line)
+    return (logic.score, logic.lines, logic.block_count, int(bool(
+        logic.running)), zlib.crc32(cells))
+
+
+class ReplayRecorder:
+    """
+    录像记录器
+    在玩家实例上包装control_*与逐帧更新方法，须在绑定按键与开局reset之后创建
+    暂停期间无效的操作不记录
+    """
+
+    def __init__(self, *logics):
+        self.logics = logics
+        self.kind = _logic_kind(logics[0])
+        tick = 'event_update_frame'
+        if self.kind == KIND_LOGIC:
+            tick = 'event_update'
+        self.frame = self.last_frame = 0  # 全局帧计数
+        self.depth = 0  # 操作内部调用的更新不计帧
+        self.buf = bytearray()
+        self.header = self.dump_header()
+        self.wrapped = []  # (玩家, 方法名) 便于解除
+
+        for index, logic in enumerate(logics):
+            self.wrap(logic, tick, self.wrap_tick)
+            for op, name in OPERATIONS.items():
+                if hasattr(logic, name):
+                    self.wrap(logic, name, self.wrap_control, index, op)
+
+            # TetrisLogicAuto的操作表持有原绑定方法
+            operations = getattr(logic, 'OPERATIONS', None)
+            if operations:
+                for key, func in operations.items():
+                    operations[key] = getattr(logic, func.__name__)
+
+    def dump_header(self):
+        logic = self.logics[0]
+        res = HEADER.pack(MAGIC, VERSION, self.kind, len(self.logics),
+                          logic.width, logic.height,
+                          getattr(logic, 'dscore', 0))
+        if not isinstance(logic.generator, str):
+            raise ValueError('only named block generators can be recorded')
+        generator = logic.generator.encode()
+        res += bytes([len(generator)]) + generator
+        for logic in self.logics:
+            seed = RandSeq.SEED if logic.seed is None else logic.seed
+            if isinstance(seed, int):
+                res += SEED_INT.pack(0, seed)
+            else:
+                res += SEED_FLOAT.pack(1, seed)
+        return res
+
+    def wrap(self, logic, name, wrapper, *a):
+        func = getattr(logic, name)
+        setattr(logic, name, wrapper(logic, func, *a))
+        self.wrapped.append((logic, name))
+
+    def wrap_tick(self, logic, func):
+        def tick(*a):
+            if self.depth:
+                return func(*a)
+            self.frame += 1
+            return func(*a)
+
+        tick.__name__ = func.__name__
+        return tick
+
+    def wrap_control(self, logic, func, index, op):
+        def control(*a):
+            if op in UNPAUSED or not logic.paused:
+                self.record(index, op, a[:2] if op == OP_DROP else ())
+            self.depth += 1
+            try:
+                return func(*a)
+            finally:
+                self.depth -= 1
+
+        control.__name__ = func.__name__
+        return control
+
+    def record(self, index, op, args=()):
+        """ 写入一条(帧间隔, 操作码)记录 """
+        _write_varint(self.buf, self.frame - self.last_frame)
+        self.last_frame = self.frame
+        self.buf.append(index << 4 | op)
+        for arg in args:
+            self.buf.append(arg & 0xff)
+
+    def detach(self):
+        """ 还原被包装的方法 """
+        for logic, name in self.wrapped:
+            delattr(logic, name)
+        self.wrapped = []
+        for logic in self.logics:
+            operations = getattr(logic, 'OPERATIONS', None)
+            if operations:
+                for key, func in operations.items():
+                    operations[key] = getattr(logic, func.__name__)
+
+    def dump(self):
+        """ 返回包含终局状态的完整录像 """
+        res = bytearray(self.header) + self.buf
+        _write_varint(res, self.frame - self.last_frame)
+        res.append(OP_END)
+        for logic in self.logics:
+            res += STATE.pack(*logic_state(logic))
+        return bytes(res)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.dump())
+
+
+def load_logics(data):
+    """
+    由录像头部创建初始玩家
+    Returns:
+        (玩家列表, 记录起始位置)
+    """
+    magic, version, kind, nplayer, width, height, dscore = HEADER.unpack_from(
+        data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a yTetris replay')
+    pos = HEADER.size
+    generator = data[pos + 1:pos + 1 + data[pos]].decode()
+    pos += 1 + data[pos]
+
+    logics = []
+    for _ in range(nplayer):
+        seed_kind = data[pos]
+        seed = (SEED_FLOAT if seed_kind else SEED_INT).unpack_from(data,
+                                                                   pos)[1]
+        pos += SEED_INT.size
+        kw = {'size': (width, height), 'seed': seed, 'generator': generator}
+        if kind == KIND_LOGIC:
+            logics.append(TetrisLogic(**kw))
+        elif kind == KIND_FRAME:
+            logics.append(TetrisLogicFrame(None, **kw))
+        else:
+            logics.append(TetrisLogicVersus(None, dscore, **kw))
+    if kind == KIND_VERSUS and nplayer == 2:
+        logics[0].opponent, logics[1].opponent = logics[1], logics[0]
+    return logics, pos
+
+
+def replay(data):
+    """
+    无界面全速重演录像并校验终局状态
+    Returns:
+        {'frames': 帧数, 'players': [各玩家终局状态], 'match': 是否与记录一致}
+    """
+    logics, pos = load_logics(data)
+    ticks = [
+        getattr(logic, 'event_update_frame', logic.event_update)
+        for logic in logics
+    ]
+    frame = 0
+    while True:
+        delta, pos = _read_varint(data, pos)
+        for _ in range(delta):  # 轮流更新各玩家
+            ticks[frame % len(ticks)]()
+            frame += 1
+
+        code = data[pos]
+        pos += 1
+        if code == OP_END:
+            break
+        logic, op = logics[code >> 4], code & 0xf
+        if op == OP_DROP:
+            getattr(logic, OPERATIONS[op])(data[pos], data[pos + 1])
+            pos += 2
+        else:
+            getattr(logic, OPERATIONS[op])()
+
+    states = [logic_state(logic) for logic in logics]
+    expected = [STATE.unpack_from(data, pos + i * STATE.size)
+                for i in range(len(logics))]
+    return {
+        'frames': frame,
+        'players': [
+            dict(zip(('score', 'lines', 'pieces', 'alive', 'crc'), state))
+            for state in states
+        ],
+        'match': states == expected,
+    }
+
+
+def main():
+    import argparse, time
+
+    parser = argparse.ArgumentParser(description='录像回放校验')
+    parser.add_argument('files', nargs='+', help='录像文件')
+    args = parser.parse_args()
+
+    for path in args.files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        start = time.perf_counter()
+        res = replay(data)
+        elapsed = time.perf_counter() - start
+        scores = ' '.join(str(p['score']) for p in res['players'])
+        print(f'{path}: {res["frames"]} frames in {elapsed:.2f}s'
+              f' score:{scores} {"OK" if res["match"] else "MISMATCH"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import time, math
+
+__doc__ = """固定帧率调度器
+    以单调时钟与累加器按固定逻辑帧率调用更新函数，与实际调度时机解耦
+    调度延迟时一次补足落后的帧，补帧期间不逐帧绘制，超过上限的帧直接丢弃
+    统计帧间隔抖动，供tk.after与终端主循环共用
+"""
+
+
+class FrameScheduler:
+    """
+    固定帧率调度器
+    update: 每逻辑帧调用一次
+    draw: 每次advance执行过更新后调用一次，可为None
+    step: 逻辑帧间隔（秒）
+    max_catchup: 单次advance最多执行的帧数，超出部分丢弃
+    """
+
+    def __init__(self, update, draw=None, step=0.075, max_catchup=5,
+                 clock=time.monotonic):
+        self.update, self.draw = update, draw
+        self.step = step
+        self.max_catchup = max_catchup
+        self.clock = clock
+        self.busy = False  # 正在执行更新，期间的绘制请求应推迟
+        self.reset()
+
+    def resume(self):
+        """ 重置时钟与累加器，暂停恢复时调用，不计入暂停时长 """
+        self.last = self.clock()
+        self.acc = 0.0  # 尚未执行的累计时间
+        self.last_frame = None  # 上次执行更新的时刻
+
+    def reset(self):
+        """ 重置时钟与统计，开局时调用 """
+        self.resume()
+
+        # 统计
+        self.frames = 0  # 已执行帧数
+        self.dropped = 0  # 丢弃帧数
+        self.catchups = 0  # 单次执行多帧的次数
+        self.jitter_n = 0
+        self.jitter_sum = self.jitter_sq = self.jitter_max = 0.0
+
+    def advance(self):
+        """
+        执行到期的逻辑帧
+        Returns:
+            本次执行的帧数
+        """
+        now = self.clock()
+        self.acc += now - self.last
+        self.last = now
+
+        nframe = 0
+        self.busy = True
+        try:
+            while self.acc >= self.step and nframe < self.max_catchup:
+                self.update()
+                self.acc -= self.step
+                nframe += 1
+        finally:
+            self.busy = False
+
+        if self.acc >= self.step:  # 超出补帧上限
+            skip = int(self.acc // self.step)
+            self.dropped += skip
+            self.acc -= skip * self.step
+
+        if nframe:
+            self.frames += nframe
+            self.catchups += nframe > 1
+            if self.last_frame is not None:  # 实际间隔相对理想间隔的偏差
+                error = abs(now - self.last_frame - nframe * self.step)
+                self.jitter_n += 1
+                self.jitter_sum += error
+                self.jitter_sq += error * error
+                self.jitter_max = max(self.jitter_max, error)
+            self.last_frame = now
+            if self.draw:
+                self.draw()
+        return nframe
+
+    def delay(self):
+        """ 距下一逻辑帧的秒数 """
+        return max(self.step - self.acc - (self.clock() - self.last), 0)
+
+    def delay_ms(self):
+        """ 距下一逻辑帧的毫秒数，供tk.after使用 """
+        return max(int(self.delay() * 1000), 1)
+
+    def stats(self):
+        """ 返回帧统计字典，抖动单位为秒 """
+        n = max(self.jitter_n, 1)
+        mean = self.jitter_sum / n
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'catchups': self.catchups,
+            'jitter_mean': mean,
+            'jitter_std': math.sqrt(max(self.jitter_sq / n - mean * mean, 0)),
+            'jitter_max': self.jitter_max,
+        }
+
+    def dump_stats(self):
+        """ 返回统计说明文字 """
+        stats = self.stats()
+        return (f'frames:{stats["frames"]} dropped:{stats["dropped"]}'
+                f' catchups:{stats["catchups"]}'
+                f' jitter:{stats["jitter_mean"] * 1000:.1f}'
+                f'±{stats["jitter_std"] * 1000:.1f}ms'
+                f' max:{stats["jitter_max"] * 1000:.1f}ms')
@@ -0,0 +1,227 @@
+import time, collections
+from tetris_base import Block
+from tetris_ai_examples import PDDrop, PDFeatures
+
+__doc__ = """预览方块搜索
+    基于当前方块与next_block预览方块的束搜索，可选择是否交换预览方块顺序
+    置换表以消行后的场地与剩余方块序列为键，LRU淘汰，不同落子顺序到达的相同局面只评估一次
+    PDAnytime为限时版本，先给出单步贪心落点，再逐层加深搜索直至截止时刻
+"""
+
+
+class SearchTimeout(Exception):
+    """ 搜索超过截止时刻 """
+
+
+class TranspositionTable:
+    """
+    LRU置换表
+    超出容量时淘汰最久未使用的项
+    """
+
+    def __init__(self, size=100000):
+        self.size = size
+        self.table = collections.OrderedDict()
+        self.hits = self.misses = 0  # 命中统计
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, key):
+        """ 查询并标记为最近使用，未命中返回None """
+        value = self.table.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.table.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.table[key] = value
+        self.table.move_to_end(key)
+        if len(self.table) > self.size:
+            self.table.popitem(last=False)
+
+    def clear(self):
+        self.table.clear()
+        self.hits = self.misses = 0
+
+
+class PDLookahead(PDDrop):
+    """
+    预览搜索版Pierre Dellacherie AI
+    对当前方块与预览方块做束搜索，路径估值为各步PD值之和
+    evaluate返回(x, phase, swap)，swap为真时先交换预览方块顺序再落下
+    """
+    DEPTH = 3  # 搜索深度（含当前方块）
+    BEAM = 5  # 每层按单步PD值保留的候选数
+    TABLE_SIZE = 100000  # 置换表容量
+    DEAD = -1e9  # 顶行溢出的估值
+
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.preview = []  # 预览方块类型
+        self.table = TranspositionTable(self.TABLE_SIZE)
+        self.nodes = 0  # 已展开的局面数
+
+    def event_preview(self, blocks):
+        """ 记录预览方块 """
+        self.preview = [block.type for block in blocks]
+
+    def expand(self, features, block):
+        """
+        按单步PD值降序返回前BEAM个落点
+        Returns:
+            [(PD值, 操作距离, 落点方块), ...]
+        """
+        self.nodes += 1
+        res = []
+        for dphase, mblock in features.drops(block):
+            self.check_deadline()
+            res.append((features.calc_pd(mblock),
+                        -100 * abs(mblock.x - block.x) - dphase,
+                        mblock.copy()))
+        res.sort(key=lambda item: item[:2], reverse=True)
+        return res[:self.BEAM]
+
+    def spawn(self, type):
+        """ 生成位于出生点的方块 """
+        block = Block(Block.BLOCK_NAMES.index(type))
+        block.x, block.y = self.width // 2, self.height
+        return block
+
+    def search(self, rows, seq):
+        """
+        估计场地rows上依次放置seq中方块的最优估值和
+        rows: 逐行位整数元组
+        seq: 方块类型元组
+        """
+        if not seq:
+            return 0
+        key = rows, seq
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        self.check_deadline()
+
+        features = PDFeatures.from_rows(rows, self.width, self.height)
+        value = self.DEAD
+        for pd_value, dist, mblock in self.expand(features,
+                                                  self.spawn(seq[0])):
+            self.check_deadline()
+            child, nline = features.place(mblock)
+            if child[-1]:  # 顶行溢出
+                continue
+            value = max(value, pd_value + self.search(child, seq[1:]))
+        self.table.put(key, value)
+        return value
+
+    def check_deadline(self):
+        """ 限时搜索的截止检查，不限时版本无操作 """
+
+    def get_best_move(self, original_block, pool, depth=None):
+        """
+        搜索当前方块最优落点及是否交换预览顺序
+        depth: 搜索深度（含当前方块），默认为DEPTH
+        Returns:
+            (落点方块, 是否交换)
+        """
+        features = PDFeatures(pool, self.width, self.height)
+        preview = tuple(self.preview[:(depth or self.DEPTH) - 1])
+
+        # 交换仅改变两个预览方块的先后
+        orders = [(preview, False)]
+        if len(preview) > 1 and preview[0] != preview[1]:
+            orders.append(((preview[1], preview[0]) + preview[2:], True))
+
+        mmove, mvalue = (None, False), (-1e10, 1e10)
+        for pd_value, dist, mblock in self.expand(features, original_block):
+            self.check_deadline()
+            child, nline = features.place(mblock)
+            for seq, swap in orders:
+                value = pd_value
+                value += self.DEAD if child[-1] else self.search(child, seq)
+                if (value, dist - swap) > mvalue:
+                    mmove, mvalue = (mblock, swap), (value, dist - swap)
+        return mmove
+
+    def evaluate(self, block, pool):
+        if not block:
+            return None
+        mblock, swap = self.get_best_move(block, pool)
+        return mblock and (mblock.x, mblock.phase, swap)
+
+
+class PDAnytime(PDLookahead):
+    """
+    限时迭代加深版预览搜索AI
+    深度1为单步贪心落点，此后每层多搜索一个预览方块，截止时刻到达时采用已完成的最深结果
+    time_budget: 每个方块的搜索时限（秒），None为不限时
+    max_depth: 最大搜索深度，受预览方块数限制
+    两者为实例属性，可在对局中随时调整强度与延迟
+    """
+    TIME_BUDGET = 0.05
+    MAX_DEPTH = 3
+    SAFETY = 0.9  # 截止时刻取时限的比例，为收尾与调用开销留出余量
+
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.time_budget = self.TIME_BUDGET
+        self.max_depth = self.MAX_DEPTH
+        self.deadline = None  # 本次搜索的截止时刻
+
+        # 统计
+        self.depth = 0  # 上次搜索完成的深度
+        self.search_time = 0.0  # 累计搜索时间
+        self.moves = 0  # 已决策方块数
+        self.depth_sum = 0
+        self.timeouts = 0  # 未完成最大深度的决策数
+
+    def configure(self, time_budget=None, max_depth=None):
+        """ 调整搜索时限与最大深度，None的项保持不变 """
+        if time_budget is not None:
+            self.time_budget = time_budget
+        if max_depth is not None:
+            self.max_depth = max_depth
+
+    def check_deadline(self):
+        if self.deadline and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def get_best_move(self, original_block, pool, depth=None):
+        """ 逐层加深，返回已完成的最深一层的结果 """
+        if depth:
+            return super().get_best_move(original_block, pool, depth)
+
+        start = time.perf_counter()
+        self.deadline = None  # 贪心落点不受时限约束，保证总有结果
+        move = super().get_best_move(original_block, pool, 1)
+        self.depth = 1
+        if self.time_budget is not None:
+            self.deadline = start + self.SAFETY * self.time_budget
+
+        max_depth = min(self.max_depth, len(self.preview) + 1)
+        try:
+            for depth in range(2, max_depth + 1):
+                move = super().get_best_move(original_block, pool, depth)
+                self.depth = depth
+        except SearchTimeout:
+            self.timeouts += 1
+        self.deadline = None
+
+        self.search_time += time.perf_counter() - start
+        self.moves += 1
+        self.depth_sum += self.depth
+        return move
+
+    def stats(self):
+        """ 返回搜索统计字典 """
+        return {
+            'moves': self.moves,
+            'nodes': self.nodes,
+            'nodes_per_sec': self.nodes / max(self.search_time, 1e-9),
+            'depth': self.depth,
+            'depth_mean': self.depth_sum / max(self.moves, 1),
+            'timeouts': self.timeouts,
+        }
@@ -0,0 +1,416 @@
+import random, struct, asyncio
+from tetris_base import Block, TetrisLogicVersus
+from tetris_scheduler import FrameScheduler
+from tetris_replay import OPERATIONS, OP_DROP
+
+__doc__ = """对战服务器
+    单个asyncio事件循环以共享的固定帧率推进全部对局，连接的客户端按到达顺序两两配对
+    客户端发送操作码，服务器每帧向双方发送紧凑的状态增量（双方方块位姿与变化的场地行）
+
+    消息均以2字节长度为前缀（小端）
+    客户端->服务器: 操作码1字节（同tetris_replay），落点操作后接x、phase各1字节
+    服务器->客户端:
+        HELLO: 类型, 玩家序号, 宽, 高, 种子(8字节)
+        FRAME: 类型, 帧号(4字节)，双方各一段:
+            方块计数, 方块类型(无方块为255), x, y, 相位, 两个预览方块类型, 得分(4字节), 变化行数
+            其后各变化行: 行号(1字节) + 行位掩码((宽+7)//8字节)
+        END: 类型, 胜者序号(平局为255), 双方得分
+    方块坐标为有符号单字节、行号与宽高为单字节，场地宽高不超过MAX_SIZE
+"""
+
+MSG_HELLO, MSG_FRAME, MSG_END = range(3)
+NO_BLOCK = 255
+MAX_SIZE = 120  # 方块可越出场地边缘数格，坐标须在有符号单字节内
+
+LENGTH = struct.Struct('<H')
+HELLO = struct.Struct('<BBBBq')
+FRAME = struct.Struct('<BI')
+PLAYER = struct.Struct('<BBbbBBBiB')
+END = struct.Struct('<BBii')
+
+
+def _block_index(block):
+    return Block.BLOCK_NAMES.index(block.type)
+
+
+class Match:
+    """
+    服务器上的一场对局
+    双方使用相同种子的位场地对战逻辑，sent记录已发送给客户端的状态以计算增量
+    """
+
+    def __init__(self, players, seed, size=(10, 20), score_per_line=10):
+        self.players = players  # 双方连接的StreamWriter
+        self.seed = seed
+        self.logics = [
+            TetrisLogicVersus(
+                None, score_per_line, size=size, seed=seed, bitboard=True)
+            for _ in players
+        ]
+        a, b = self.logics
+        a.opponent, b.opponent = b, a
+        for logic in self.logics:
+            logic.event_update()  # 生成首个方块
+        self.frame = 0
+        self.sent = [None] * len(players)  # (场地行, 位姿) 上次发送的状态
+        self.row_bytes = (self.logics[0].width + 7) // 8
+
+    @property
+    def running(self):
+        return all(logic.running for logic in self.logics)
+
+    def control(self, index, op, args=()):
+        """ 执行客户端操作 """
+        logic = self.logics[index]
+        getattr(logic, OPERATIONS[op])(*args)
+
+    def update(self):
+        """ 双方各更新一帧 """
+        self.frame += 1
+        for logic in self.logics:
+            logic.event_update_frame()
+
+    def dump_player(self, index):
+        """ 返回玩家状态增量，无变化时返回None """
+        logic = self.logics[index]
+        rows = tuple(logic.pool.rows)
+        block = logic.curr_block
+        pose = (logic.block_count & 0xff,
+                _block_index(block) if block else NO_BLOCK,
+                block.x if block else 0, block.y if block else 0,
+                block.phase if block else 0,
+                *(_block_index(x) for x in logic.next_block), logic.score)
+
+        last = self.sent[index]
+        if last and last == (rows, pose):
+            return None
+        old_rows = last[0] if last else (0, ) * len(rows)
+        changed = [y for y, (a, b) in enumerate(zip(rows, old_rows)) if a != b]
+        self.sent[index] = rows, pose
+
+        res = bytearray(PLAYER.pack(*pose, len(changed)))
+        for y in changed:
+            res.append(y)
+            res += rows[y].to_bytes(self.row_bytes, 'little')
+        return res
+
+    def dump_frame(self):
+        """ 返回本帧的FRAME消息，双方均无变化时返回None """
+        parts = [self.dump_player(i) for i in range(len(self.logics))]
+        if not any(parts):
+            return None
+        res = bytearray(FRAME.pack(MSG_FRAME, self.frame))
+        for i, part in enumerate(parts):
+            if part is None:  # 仅另一方变化，本方重发位姿
+                rows, pose = self.sent[i]
+                part = PLAYER.pack(*pose, 0)
+            res += part
+        return res
+
+    def dump_end(self):
+        alive = [bool(logic.running) for logic in self.logics]
+        winner = alive.index(True) if alive.count(True) == 1 else NO_BLOCK
+        return END.pack(MSG_END, winner,
+                        *(logic.score for logic in self.logics))
+
+
+class MatchServer:
+    """
+    对战服务器
+    step: 逻辑帧间隔（秒），全部对局共用
+    max_buffer: 客户端待发送数据上限（字节），超出视为断线
+    """
+
+    def __init__(self, size=(10, 20), step=0.075, seed=None,
+                 score_per_line=10, max_buffer=1 << 16):
+        if not all(0 < n <= MAX_SIZE for n in size):
+            raise ValueError(f'unsupported size {size}, max {MAX_SIZE}')
+        self.size = size
+        self.score_per_line = score_per_line
+        self.max_buffer = max_buffer
+        self.rng = random.Random(seed)
+        self.waiting = None  # 等待配对的连接
+        self.matches = set()
+        self.paired = {}  # StreamWriter -> (对局, 玩家序号)
+        self.ready = {}  # StreamWriter -> 配对完成事件
+        self.scheduler = FrameScheduler(self.update, self.flush, step)
+        self.frames = self.bytes_sent = 0
+
+    def send(self, writer, payload):
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > self.max_buffer:
+            writer.close()  # 接收过慢
+            return
+        writer.write(LENGTH.pack(len(payload)) + payload)
+        self.bytes_sent += LENGTH.size + len(payload)
+
+    def pair(self, writer):
+        """ 与等待中的连接配对，或进入等待 """
+        waiting = self.waiting
+        if waiting is None or waiting.is_closing():
+            self.waiting = writer
+            self.ready[writer] = asyncio.Event()
+            return
+        self.waiting = None
+        match = Match((waiting, writer), self.rng.getrandbits(63), self.size,
+                      self.score_per_line)
+        self.matches.add(match)
+        width, height = self.size
+        for index, player in enumerate(match.players):
+            self.paired[player] = match, index
+            self.send(player,
+                      HELLO.pack(MSG_HELLO, index, width, height, match.seed))
+        self.ready.pop(waiting).set()
+
+    async def wait_paired(self, reader, writer):
+        """
+        等待配对完成，期间持续读取以发现断线
+        配对前收到的数据无意义，直接丢弃
+        Returns:
+            是否配对成功，断线时为False
+        """
+        ready = asyncio.ensure_future(self.ready[writer].wait())
+        read = None
+        try:
+            while not ready.done():
+                read = asyncio.ensure_future(reader.read(256))
+                await asyncio.wait((ready, read),
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if read.done() and not read.result():  # 对方已断开
+                    return False
+            return writer in self.paired
+        finally:
+            tasks = [task for task in (ready, read) if task]
+            for task in tasks:
+                task.cancel()
+            # 等待取消完成，reader同时只允许一个读取者
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle(self, reader, writer):
+        """ 单个客户端连接 """
+        self.pair(writer)
+        try:
+            if writer in self.ready:
+                if not await self.wait_paired(reader, writer):
+                    return
+            while True:
+                op = (await reader.readexactly(1))[0]
+                if op not in OPERATIONS:
+                    break
+                args = ()
+                if op == OP_DROP:
+                    args = tuple(await reader.readexactly(2))
+                if writer not in self.paired:  # 对局已结束
+                    break
+                match, index = self.paired[writer]
+                match.control(index, op, args)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.drop(writer)
+
+    def drop(self, writer):
+        """ 连接断开，对局中的一方判负 """
+        if self.waiting is writer:
+            self.waiting = None
+            self.ready.pop(writer).set()
+        if writer in self.paired:
+            match, index = self.paired[writer]
+            match.logics[index].running = 0
+        writer.close()
+
+    def update(self):
+        """ 全部对局各更新一帧 """
+        self.frames += 1
+        for match in self.matches:
+            if match.running:
+                match.update()
+
+    def flush(self):
+        """ 发送各对局的状态增量，结束的对局发送结果并断开 """
+        for match in list(self.matches):
+            msg = match.dump_frame()
+            if msg:
+                for player in match.players:
+                    self.send(player, msg)
+            if not match.running:
+                msg = match.dump_end()
+                for player in match.players:
+                    self.send(player, msg)
+                    self.paired.pop(player, None)
+                    player.close()
+                self.matches.discard(match)
+
+    async def run(self, host='127.0.0.1', port=7777):
+        """ 启动监听并按固定帧率推进 """
+        server = await asyncio.start_server(
+            self.handle, host, port, backlog=1024)  # 大量客户端同时连接
+        async with server:
+            self.scheduler.reset()
+            while True:
+                self.scheduler.advance()
+                await asyncio.sleep(self.scheduler.delay())
+
+
+class MatchClient:
+    """
+    对战客户端
+    boards: 双方场地镜像（逐行位整数）；poses: 双方(方块计数, 类型, x, y, 相位, 预览1, 预览2, 得分)
+    """
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.index = None
+        self.boards = self.poses = None
+        self.result = None  # (胜者序号, 双方得分)
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=7777):
+        """ 连接并等待配对 """
+        client = cls(*await asyncio.open_connection(host, port))
+        msg = await client.recv()
+        _, client.index, width, height, client.seed = HELLO.unpack(msg)
+        client.width, client.height = width, height
+        client.row_bytes = (width + 7) // 8
+        client.boards = [[0] * (height + 1) for _ in range(2)]
+        client.poses = [None, None]
+        return client
+
+    async def recv(self):
+        size = LENGTH.unpack(await self.reader.readexactly(LENGTH.size))[0]
+        return await self.reader.readexactly(size)
+
+    def send(self, op, *args):
+        """ 发送操作码，落点操作附带(x, phase) """
+        self.writer.write(bytes((op, *(arg & 0xff for arg in args))))
+
+    def apply(self, msg):
+        """ 将FRAME消息应用于本地镜像，返回帧号 """
+        _, frame = FRAME.unpack_from(msg)
+        pos = FRAME.size
+        for i in range(2):
+            *pose, nrow = PLAYER.unpack_from(msg, pos)
+            pos += PLAYER.size
+            self.poses[i] = tuple(pose)
+            board = self.boards[i]
+            for _ in range(nrow):
+                y = msg[pos]
+                board[y] = int.from_bytes(msg[pos + 1:pos + 1 + self.row_bytes],
+                                          'little')
+                pos += 1 + self.row_bytes
+        return frame
+
+    async def frames(self):
+        """ 逐帧接收并更新镜像直至对局结束，生成帧号 """
+        try:
+            while True:
+                msg = await self.recv()
+                if msg[0] == MSG_FRAME:
+                    yield self.apply(msg)
+                elif msg[0] == MSG_END:
+                    _, winner, *scores = END.unpack(msg)
+                    self.result = winner, scores
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    def block(self, index=None):
+        """ 以镜像位姿构造方块，无方块时返回None """
+        count, type, x, y, phase, *_ = self.poses[
+            self.index if index is None else index]
+        if type == NO_BLOCK:
+            return None
+        block = Block(type)
+        block.x, block.y, block.phase = x, y, phase
+        return block
+
+    def pool(self, index=None):
+        """ 以镜像场地构造列表场地副本，供AI使用 """
+        board = self.boards[self.index if index is None else index]
+        return [[row >> x & 1 for x in range(self.width)] for row in board]
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_bot(host, port, AI_class=None, rng=None, max_frames=None):
+    """
+    测试用机器人客户端
+    给出落点版AI时每个新方块决策一次，否则随机操作
+    max_frames: 收到该帧号后主动断开
+    Returns:
+        (胜者序号, 双方得分)，未完成对局时为None
+    """
+    client = await MatchClient.connect(host, port)
+    AI = AI_class and AI_class(client.width, client.height)
+    rng = rng or random.Random()
+    last_count = None
+    async for frame in client.frames():
+        if max_frames and frame >= max_frames:
+            break
+        pose = client.poses[client.index]
+        if AI:
+            if pose[1] != NO_BLOCK and pose[0] != last_count:
+                last_count = pose[0]
+                target = AI.evaluate(client.block(), client.pool())
+                if target:
+                    client.send(OP_DROP, *target[:2])
+        elif rng.random() < 0.3:
+            client.send(rng.choice(list(set(OPERATIONS) - {OP_DROP})))
+    client.close()
+    return client.result
+
+
+async def run_bots(n,
+                   host='127.0.0.1',
+                   port=7777,
+                   AI_class=None,
+                   seed=0,
+                   max_frames=None):
+    """ 并发运行n个机器人客户端 """
+    return await asyncio.gather(*(run_bot(host, port, AI_class,
+                                          random.Random(seed + i), max_frames)
+                                  for i in range(n)))
+
+
+def main():
+    import argparse, time
+    from tetris_headless import load_AI
+
+    parser = argparse.ArgumentParser(description='asyncio对战服务器')
+    parser.add_argument(
+        'mode', choices=['serve', 'bots'], help='serve运行服务器，bots运行测试客户端')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--step', type=float, default=0.075, help='逻辑帧间隔')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    parser.add_argument('-n', type=int, default=2, help='机器人客户端数')
+    parser.add_argument('--ai', help='机器人使用的落点版AI，缺省为随机操作')
+    parser.add_argument('--frames', type=int, help='机器人在该帧后断开')
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        try:
+            server = MatchServer(tuple(args.size), args.step, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            asyncio.run(server.run(args.host, args.port))
+        except KeyboardInterrupt:
+            print(f'{server.frames} frames, {server.bytes_sent} bytes sent,'
+                  f' {server.scheduler.dump_stats()}')
+    else:
+        AI_class = args.ai and load_AI(args.ai)
+        start = time.perf_counter()
+        results = asyncio.run(
+            run_bots(args.n, args.host, args.port, AI_class, args.seed or 0,
+                     args.frames))
+        done = [r for r in results if r]
+        print(f'{len(done)}/{len(results)} clients finished'
+              f' in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
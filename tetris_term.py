@@ -0,0 +1,198 @@
+import os, sys, time, select
+from tetris_base import TetrisLogicVersus, TetrisLogicAuto
+from tetris_headless import load_AI
+from tetris_scheduler import FrameScheduler
+from tetris_async import TetrisLogicAsync
+
+__doc__ = """终端俄罗斯方块
+    不依赖tkinter与图形界面，以ANSI转义序列在终端绘制，可经SSH观看AI对局
+    游戏逻辑以固定帧间隔推进，与绘制解耦；绘制有每秒次数上限，且只输出变化的格子
+    按键: a/d 左右 w 旋转 s 加速 x 取消加速 p 交换预览 q 退出
+"""
+
+KEYS = {
+    'a': 'control_left',
+    'd': 'control_right',
+    'w': 'control_rotate',
+    's': 'control_speedup',
+    'x': 'control_speeddown',
+    'p': 'control_swap',
+}
+
+
+class TerminalScreen:
+    """
+    ANSI终端画面
+    记录已输出的各行文本，仅重写变化的片段
+    """
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.lines = {}  # (行, 列) -> 已输出文本
+        self.buf = []
+
+    def put(self, row, col, text):
+        """ 在(row, col)处写入文本，仅输出与上次不同的片段 """
+        old = self.lines.get((row, col), '')
+        self.lines[row, col] = text
+        i, n = 0, len(text)
+        while i < n:
+            if i < len(old) and old[i] == text[i]:
+                i += 1
+                continue
+            j = i
+            while j < n and not (j < len(old) and old[j] == text[j]):
+                j += 1
+            self.buf.append(f'\x1b[{row + 1};{col + i + 1}H{text[i:j]}')
+            i = j
+        if len(old) > n:  # 清除多余字符
+            self.buf.append(f'\x1b[{row + 1};{col + n + 1}H'
+                            f'{" " * (len(old) - n)}')
+
+    def flush(self):
+        if self.buf:
+            self.out.write(''.join(self.buf))
+            self.out.flush()
+            self.buf = []
+
+    def clear(self):
+        self.lines = {}
+        self.out.write('\x1b[2J\x1b[H')
+
+
+class TerminalGame:
+    """
+    终端游戏主循环
+    players: 各玩家的AI类，None为键盘操作（至多一名）
+    budget: AI决策时间预算（秒），给出时AI在工作线程中决策，不阻塞逻辑帧
+    """
+
+    def __init__(self, players, seed=None, step=0.075, fps=20, budget=None,
+                 **kw):
+        self.draw_interval = 1 / fps  # 最短绘制间隔（秒）
+        self.next_draw = 0
+        self.screen = TerminalScreen()
+        self.human = None
+
+        self.logics = []
+        for AI_class in players:
+            if AI_class is None:
+                logic = TetrisLogicVersus(None, seed=seed, **kw)
+                self.human = logic
+            elif budget:
+                logic = TetrisLogicAsync(
+                    AI_class, None, seed=seed, time_budget=budget, **kw)
+            else:
+                logic = TetrisLogicAuto(AI_class, None, seed=seed, **kw)
+            self.logics.append(logic)
+        if len(self.logics) == 2:
+            a, b = self.logics
+            a.opponent, b.opponent = b, a
+
+        self.draws = 0
+        self.scheduler = FrameScheduler(self.update, self.draw_capped, step)
+
+    @property
+    def running(self):
+        return all(logic.running for logic in self.logics)
+
+    def read_keys(self, timeout):
+        """ 等待至多timeout秒并处理按键，返回是否退出 """
+        if not sys.stdin.isatty():
+            time.sleep(max(timeout, 0))
+            return False
+        ready, _, _ = select.select([sys.stdin], [], [], max(timeout, 0))
+        if not ready:
+            return False
+        for key in os.read(sys.stdin.fileno(), 64).decode(errors='ignore'):
+            if key == 'q':
+                return True
+            if self.human and key in KEYS:
+                getattr(self.human, KEYS[key])()
+        return False
+
+    def update(self):
+        """ 各玩家更新一帧，终局后不再推进 """
+        if self.running:
+            for logic in self.logics:
+                logic.event_update_frame()
+
+    def draw_capped(self):
+        """ 距上次绘制超过最短间隔时绘制 """
+        now = time.monotonic()
+        if now >= self.next_draw:
+            self.draw()
+            self.next_draw = now + self.draw_interval
+
+    def draw(self):
+        """ 输出各玩家变化的行与状态栏 """
+        col = 0
+        for logic in self.logics:
+            for i, line in logic.dump_diff():
+                self.screen.put(i + 1, col, line)
+            col += 2 * logic.width + 3
+        self.screen.put(0, 0, ' || '.join(
+            logic.dump_info() for logic in self.logics).ljust(col))
+        self.screen.flush()
+        self.draws += 1
+
+    def run(self):
+        """ 固定帧间隔推进游戏逻辑，按上限频率绘制 """
+        self.screen.clear()
+        self.draw()
+
+        self.scheduler.reset()
+        while self.running:
+            self.scheduler.advance()
+            if self.read_keys(self.scheduler.delay()):
+                break
+        self.draw()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='终端俄罗斯方块')
+    parser.add_argument(
+        'players',
+        nargs='*',
+        default=['human', 'PDFast'],
+        help='玩家列表: human或AI类名/module.Class，至多两名')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--step', type=float, default=0.075, help='逻辑帧间隔')
+    parser.add_argument('--fps', type=float, default=20, help='最大绘制频率')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    parser.add_argument(
+        '--budget', type=float, help='AI决策时间预算（秒），给出时AI在后台线程决策')
+    args = parser.parse_args()
+
+    players = [None if p == 'human' else load_AI(p) for p in args.players[:2]]
+    game = TerminalGame(
+        players,
+        args.seed,
+        args.step,
+        args.fps,
+        args.budget,
+        size=tuple(args.size))
+
+    # 键盘输入切换为非缓冲模式
+    attrs = None
+    if sys.stdin.isatty():
+        import termios, tty
+        attrs = termios.tcgetattr(sys.stdin)
+        tty.setcbreak(sys.stdin.fileno())
+    sys.stdout.write('\x1b[?25l')  # 隐藏光标
+    try:
+        game.run()
+    finally:
+        if attrs:
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, attrs)
+        sys.stdout.write(f'\x1b[{game.logics[0].height + 4};1H\x1b[?25h\n')
+        print(f'{game.draws} draws, {game.scheduler.dump_stats()}')
+        for logic in game.logics:
+            if isinstance(logic, TetrisLogicAsync):
+                print(logic.ai_stats())
+
+
+if __name__ == '__main__':
+    main()
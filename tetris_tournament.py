@@ -0,0 +1,218 @@
+import time, random, itertools
+from multiprocessing import Pool
+from tetris_base import TetrisLogicAuto
+from tetris_headless import run_game, load_AI
+
+__doc__ = """AI锦标赛
+    以进程池并行运行多个AI的单人局与对战局，汇总得分、消行、存活方块数与胜率
+    各局由RandSeq种子确定，对战双方使用相同种子，结果可复现
+"""
+
+MAX_FRAMES = 20000  # 默认单局帧数上限，强AI可几乎无限存活
+
+
+def run_versus(AI_1, AI_2, seed=None, max_frames=MAX_FRAMES, **kw):
+    """
+    无界面运行一局AI对战
+    max_frames: 单局帧数上限，None为不限
+    kw: 传递给TetrisLogicAuto的参数，如size、bitboard、score_per_line
+    Returns:
+        单局结果字典，winner为0/1，平局为None
+    """
+    players = [TetrisLogicAuto(AI, None, seed=seed, **kw) for AI in (AI_1, AI_2)]
+    players[0].opponent, players[1].opponent = players[1], players[0]
+
+    frames = 0
+    while all(p.running for p in players):
+        if max_frames is not None and frames >= max_frames:
+            break
+        for p in players:
+            p.event_update_frame()
+        frames += 1
+
+    # 仅一方存活时存活者胜，否则比较得分
+    alive = [bool(p.running) for p in players]
+    if alive[0] != alive[1]:
+        winner = alive.index(True)
+    elif players[0].score != players[1].score:
+        winner = int(players[1].score > players[0].score)
+    else:
+        winner = None
+    return {
+        'seed': seed,
+        'frames': frames,
+        'winner': winner,
+        'players': [{
+            'score': p.score,
+            'lines': p.lines,
+            'pieces': p.block_count - bool(p.curr_block),
+            'alive': a,
+        } for p, a in zip(players, alive)],
+    }
+
+
+def _run_task(task):
+    """ 进程池任务入口 """
+    kind, AIs, seed, limit, kw = task
+    random.seed(seed)  # 使用全局random的AI同样可复现
+    if kind == 'solo':
+        return kind, AIs, run_game(AIs[0], seed, max_frames=limit, **kw)
+    return kind, AIs, run_versus(*AIs, seed=seed, max_frames=limit, **kw)
+
+
+def _new_stats():
+    return {
+        'games': 0,
+        'score': 0,
+        'lines': 0,
+        'pieces': 0,
+        'wins': 0,
+        'draws': 0,
+        'losses': 0,
+    }
+
+
+def _add_stats(stats, res):
+    stats['games'] += 1
+    stats['score'] += res['score']
+    stats['lines'] += res['lines']
+    stats['pieces'] += res['pieces']
+
+
+def _summary(stats):
+    """ 累计值转为平均值与胜率 """
+    n = max(stats['games'], 1)
+    res = dict(stats)
+    for key in ('score', 'lines', 'pieces'):
+        res[key + '_avg'] = stats[key] / n
+    res['win_rate'] = stats['wins'] / n
+    return res
+
+
+def run_tournament(AI_classes,
+                   seeds,
+                   solo=True,
+                   versus=True,
+                   max_frames=MAX_FRAMES,
+                   processes=None,
+                   **kw):
+    """
+    运行锦标赛
+    AI_classes: TetrisAI子类列表
+    seeds: 种子序列，每个种子对每个单人项目、每组对战各运行一局
+    solo: 是否运行单人局
+    versus: 是否运行两两对战局（每组对战交换先后手各一局）
+    max_frames: 单局帧数上限，None为不限，此时强AI的单局可能无法结束
+    processes: 进程数，默认使用全部CPU核心
+    kw: 传递给TetrisLogicAuto的参数
+    Returns:
+        {
+            'solo': {AI名: 统计},
+            'versus': {AI名: 统计},
+            'matchups': {(AI名, AI名): [胜, 平, 负]},
+            'seconds': 耗时,
+        }
+    """
+    seeds = list(seeds)
+    tasks = []
+    if solo:
+        tasks.extend(('solo', (AI, ), seed, max_frames, kw)
+                     for AI in AI_classes for seed in seeds)
+    if versus:
+        tasks.extend(('versus', pair, seed, max_frames, kw)
+                     for pair in itertools.permutations(AI_classes, 2)
+                     for seed in seeds)
+
+    names = [AI.__name__ for AI in AI_classes]
+    solo_stats = {name: _new_stats() for name in names}
+    versus_stats = {name: _new_stats() for name in names}
+    matchups = {
+        pair: [0, 0, 0]
+        for pair in itertools.combinations(names, 2)
+    }
+
+    start = time.perf_counter()
+    with Pool(processes) as pool:
+        for kind, AIs, res in pool.imap_unordered(_run_task, tasks):
+            if kind == 'solo':
+                _add_stats(solo_stats[AIs[0].__name__], res)
+                continue
+
+            pair = [AI.__name__ for AI in AIs]
+            for i, name in enumerate(pair):
+                stats = versus_stats[name]
+                _add_stats(stats, res['players'][i])
+                if res['winner'] is None:
+                    stats['draws'] += 1
+                elif res['winner'] == i:
+                    stats['wins'] += 1
+                else:
+                    stats['losses'] += 1
+
+            # 对战表按名称顺序记录前者的胜平负
+            key = tuple(pair)
+            winner = res['winner']
+            if key not in matchups:
+                key = key[::-1]
+                winner = winner if winner is None else 1 - winner
+            matchups[key][1 if winner is None else 2 * winner] += 1
+
+    return {
+        'solo': {k: _summary(v) for k, v in solo_stats.items() if v['games']},
+        'versus':
+        {k: _summary(v)
+         for k, v in versus_stats.items() if v['games']},
+        'matchups': matchups,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='AI并行锦标赛')
+    parser.add_argument(
+        'ais', nargs='*', default=['PDFast', 'PDDrop'], help='AI类名或module.Class列表')
+    parser.add_argument('-n', '--games', type=int, default=10, help='种子数')
+    parser.add_argument('--seed', type=int, default=0, help='起始种子')
+    parser.add_argument(
+        '--frames', type=int, default=MAX_FRAMES, help='单局帧数上限')
+    parser.add_argument('-j', '--processes', type=int, help='进程数')
+    parser.add_argument('--no-solo', action='store_true', help='跳过单人局')
+    parser.add_argument('--no-versus', action='store_true', help='跳过对战局')
+    parser.add_argument('--size', type=int, nargs=2, default=(10, 20))
+    parser.add_argument('--bitboard', action='store_true', help='使用位场地')
+    parser.add_argument(
+        '--generator',
+        default='uniform',
+        help='方块生成器: uniform/7bag/14bag/history/file:路径')
+    args = parser.parse_args()
+
+    AI_classes = [load_AI(name) for name in args.ais]
+    res = run_tournament(
+        AI_classes,
+        range(args.seed, args.seed + args.games),
+        solo=not args.no_solo,
+        versus=not args.no_versus,
+        max_frames=args.frames,
+        processes=args.processes,
+        size=tuple(args.size),
+        bitboard=args.bitboard,
+        generator=args.generator)
+
+    for kind in ('solo', 'versus'):
+        for name, s in res[kind].items():
+            line = (f'{kind:6} {name:20} games:{s["games"]}'
+                    f' score:{s["score_avg"]:.1f} lines:{s["lines_avg"]:.1f}'
+                    f' pieces:{s["pieces_avg"]:.1f}')
+            if kind == 'versus':
+                line += (f' W/D/L:{s["wins"]}/{s["draws"]}/{s["losses"]}'
+                         f' win:{s["win_rate"]:.0%}')
+            print(line)
+    for (a, b), (w, d, l) in res['matchups'].items():
+        print(f'{a} vs {b}: {w}/{d}/{l}')
+    print(f'finished in {res["seconds"]:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
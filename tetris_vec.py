@@ -0,0 +1,226 @@
+import numpy as np
+from tetris_base import Block, RandSeq, make_block_seq
+
+__doc__ = """向量化多局环境
+    依赖numpy，以(N, height+1, width)数组同步推进N局相互独立的游戏
+    step(actions)一次完成全部对局的操作、下落、消行与底部加行
+    每局的方块与加行序列与相同种子、相同生成器的TetrisLogic一致，规则亦与之逐步对应
+"""
+
+# 动作编号
+NOOP, LEFT, RIGHT, ROTATE, SWAP, DROP = range(6)
+
+# 方块形状表 (类型, 相位, 格, xy)，相位数不足4的方块循环填充
+NPHASE = np.array([len(Block.SHAPES[name]) for name in Block.BLOCK_NAMES])
+SHAPES = np.array([[
+    Block.SHAPES[name][phase % len(Block.SHAPES[name])]
+    for phase in range(4)
+] for name in Block.BLOCK_NAMES])
+
+# 旋转防重叠偏移，顺序同TetrisLogic.try_rotate
+KICKS = [(dx, dy) for dy in range(3) for dx in (0, 1, -1)]
+
+_TYPE_INDEX = {name: i for i, name in enumerate(Block.BLOCK_NAMES)}
+
+
+class TetrisVecEnv:
+    """
+    N局同步推进的俄罗斯方块环境
+    boards: (N, height+1, width)场地数组，顶行用于判断死亡
+    types/phases/xs/ys: 各局当前方块，active为假时无当前方块
+    """
+
+    def __init__(self, n, size=(10, 20), seeds=None, generator='uniform'):
+        self.n = n
+        self.width, self.height = size
+        self.seeds = list(range(n)) if seeds is None else list(seeds)
+        self.generator = generator
+        self.reset()
+
+    def reset(self):
+        """ 全部对局开局 """
+        n, w, h = self.n, self.width, self.height
+        self.boards = np.zeros((n, h + 1, w), dtype=np.uint8)
+        self.types = np.zeros(n, dtype=np.int64)
+        self.phases = np.zeros(n, dtype=np.int64)
+        self.xs = np.zeros(n, dtype=np.int64)
+        self.ys = np.zeros(n, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)  # 存在当前方块
+        self.settled = np.zeros(n, dtype=bool)  # 下回合放置当前方块
+        self.running = np.ones(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.block_count = np.zeros(n, dtype=np.int64)
+
+        # 各局独立的方块与加行序列
+        self.block_seqs = [
+            make_block_seq(self.generator, seed) for seed in self.seeds
+        ]
+        self.grow_seqs = [
+            RandSeq(lambda rng: [rng.random() > 0.3 for i in range(w)], seed)
+            for seed in self.seeds
+        ]
+        self.next_types = np.array(
+            [[_TYPE_INDEX[seq.pop().type] for _ in range(2)]
+             for seq in self.block_seqs],
+            dtype=np.int64).reshape(n, 2)
+
+    def collide(self, idx, types, phases, xs, ys):
+        """ 判断各局idx的方块置于(xs, ys)时是否越界或与场地相交 """
+        cells = SHAPES[types, phases]
+        cx = xs[:, None] + cells[:, :, 0]
+        cy = ys[:, None] + cells[:, :, 1]
+        res = (cx < 0) | (cx >= self.width) | (cy < 0)  # 左右底边
+        inside = ~res & (cy <= self.height)  # 无上界
+        rows = np.broadcast_to(idx[:, None], cx.shape)
+        hit = np.zeros(cx.shape, dtype=bool)
+        hit[inside] = self.boards[rows[inside], cy[inside], cx[inside]]
+        return (res | hit).any(axis=1)
+
+    def try_move(self, mask, dx, dy):
+        """ 尝试平移mask中各局的方块，返回成功移动的掩码 """
+        idx = np.flatnonzero(mask)
+        moved = np.zeros(self.n, dtype=bool)
+        if not len(idx):
+            return moved
+        xs, ys = self.xs[idx] + dx, self.ys[idx] + dy
+        ok = ~self.collide(idx, self.types[idx], self.phases[idx], xs, ys)
+        idx = idx[ok]
+        self.xs[idx], self.ys[idx] = xs[ok], ys[ok]
+        moved[idx] = True
+        return moved
+
+    def try_rotate(self, mask):
+        """ 尝试旋转mask中各局的方块，规则同TetrisLogic.try_rotate """
+        idx = np.flatnonzero(mask)
+        moved = np.zeros(self.n, dtype=bool)
+        if not len(idx):
+            return moved
+        types = self.types[idx]
+        phases = (self.phases[idx] - 1) % NPHASE[types]  # rotate()方向
+        xs, ys = self.xs[idx], self.ys[idx]
+        found = np.zeros(len(idx), dtype=bool)
+        for dx, dy in KICKS:
+            ok = ~found & (ys + dy < self.height)  # 场外不可旋转
+            if not ok.any():
+                continue
+            ok[ok] = ~self.collide(idx[ok], types[ok], phases[ok],
+                                   xs[ok] + dx, ys[ok] + dy)
+            sub = idx[ok]
+            self.phases[sub] = phases[ok]
+            self.xs[sub], self.ys[sub] = xs[ok] + dx, ys[ok] + dy
+            found |= ok
+        moved[idx[found]] = True
+        return moved
+
+    def place(self, mask):
+        """ 将mask中各局的方块写入场地 """
+        idx = np.flatnonzero(mask)
+        cells = SHAPES[self.types[idx], self.phases[idx]]
+        cx = self.xs[idx, None] + cells[:, :, 0]
+        cy = self.ys[idx, None] + cells[:, :, 1]
+        inside = cy <= self.height
+        rows = np.broadcast_to(idx[:, None], cx.shape)
+        self.boards[rows[inside], cy[inside], cx[inside]] = 1
+
+    def clear_lines(self, mask):
+        """ 消除mask中各局的满行，返回各局消除行数 """
+        full = self.boards.all(axis=2) & mask[:, None]
+        nline = full.sum(axis=1)
+        idx = np.flatnonzero(nline)
+        if len(idx):
+            # 稳定排序使未满行保持原顺序下移，满行移至顶部后清空
+            order = np.argsort(full[idx], axis=1, kind='stable')
+            boards = np.take_along_axis(self.boards[idx], order[:, :, None],
+                                        axis=1)
+            top = np.arange(self.height + 1) >= (self.height + 1 -
+                                                 nline[idx, None])
+            boards[top] = 0
+            self.boards[idx] = boards
+        return nline
+
+    def add_line(self, i):
+        """ 第i局底部添加随机行，同TetrisLogic.event_add_line """
+        tmp = self.grow_seqs[i].pop()
+        while not 0 < sum(tmp) < self.width:  # 防止生成空行/满行
+            tmp = self.grow_seqs[i].pop()
+        self.boards[i, 1:] = self.boards[i, :-1].copy()
+        self.boards[i, 0] = tmp
+        if self.active[i]:
+            self.ys[i] += 1
+
+    def spawn(self, mask):
+        """ mask中各局生成新方块 """
+        for i in np.flatnonzero(mask):
+            self.types[i] = self.next_types[i, 0]
+            self.next_types[i, 0] = self.next_types[i, 1]
+            self.next_types[i, 1] = _TYPE_INDEX[self.block_seqs[i].pop().type]
+        self.phases[mask] = 0
+        self.xs[mask] = self.width // 2
+        self.ys[mask] = self.height
+        self.active[mask] = True
+        self.settled[mask] = False
+        self.block_count[mask] += 1
+
+    def update(self, mask):
+        """ mask中各局执行一次游戏逻辑更新，同TetrisLogic.event_update """
+        mask = mask & self.running
+        falling = mask & self.active & ~self.settled
+
+        # 放置方块、消行与终局判断
+        placed = mask & self.active & self.settled
+        if placed.any():
+            self.place(placed)
+            self.active[placed] = False
+            nline = self.clear_lines(placed)
+            self.score += nline * nline
+            self.lines += nline
+            dead = placed & self.boards[:, self.height].any(axis=1)
+            self.running[dead] = False
+
+        # 方块下落
+        moved = self.try_move(falling, 0, -1)
+        self.settled[falling & ~moved] = True
+
+        # 方块生成
+        self.spawn(mask & self.running & ~self.active)
+
+    def hard_drop(self, mask):
+        """ mask中各局方块直接落底并放置，同TetrisLogic.control_drop原地落下 """
+        falling = mask.copy()
+        while falling.any():
+            falling &= self.try_move(falling, 0, -1)
+        self.settled[mask] = True
+        self.update(mask)
+
+    def step(self, actions, garbage=None):
+        """
+        全部对局推进一步: 加行、执行动作、逻辑更新
+        actions: 长度N的动作编号数组
+        garbage: 长度N的本步底部加行数，可选，已结束的对局忽略
+        Returns:
+            (各局得分, 本步消除行数, 各局是否结束)
+        """
+        actions = np.asarray(actions)
+        lines = self.lines.copy()
+
+        if garbage is not None:
+            for i in np.flatnonzero(np.asarray(garbage) * self.running):
+                for _ in range(int(garbage[i])):
+                    self.add_line(i)
+
+        live = self.running & self.active
+        moved = self.try_move(live & (actions == LEFT), -1, 0)
+        moved |= self.try_move(live & (actions == RIGHT), 1, 0)
+        moved |= self.try_rotate(live & (actions == ROTATE))
+        self.settled[moved] = False
+
+        swap = self.running & (actions == SWAP)
+        self.next_types[swap] = self.next_types[swap, ::-1]
+
+        drop = live & (actions == DROP)
+        if drop.any():
+            self.hard_drop(drop)
+
+        self.update(self.running)
+        return self.score.copy(), self.lines - lines, ~self.running